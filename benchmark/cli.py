@@ -1,7 +1,9 @@
+import json
 import click
 
-from benchmark.core.runner import generate_cases as generate_test_cases, run_benchmark
-from benchmark.report.report_builder import build_report
+# Commands import their dependencies when invoked so that ``--help`` and
+# light commands start fast
+from benchmark.core.constants import TRANSPORT_MODES
 
 @click.group()
 def cli():
@@ -11,21 +13,244 @@ def cli():
 @cli.command("generate-cases")
 def generate_cases():
     """Generate test cases."""
+    from benchmark.core.runner import generate_cases as generate_test_cases
+
     generate_test_cases()
     click.echo("Test cases generated.")
 
 @cli.command("run")
 @click.option('--case-ids', '-c', multiple=True, help="Test case IDs to run. If omitted, run all.")
 @click.option('--tool-ids', '-t', multiple=True, help="Tool IDs to run. If omitted, run all.")
-def run(case_ids, tool_ids):
+@click.option('--transport', type=click.Choice(TRANSPORT_MODES), default='live', show_default=True,
+              help="Call providers live, record responses to the cassette store, or replay them offline.")
+@click.option('--cassette-dir', default=None, help="Cassette store directory for record/replay.")
+@click.option('--replay-latency', default='recorded', show_default=True,
+              help="Replay latency: recorded, none, fixed:S, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA.")
+@click.option('--repeats', '-n', default=1, show_default=True, type=click.IntRange(min=1),
+              help="Trials per case/tool pair, interleaved across tools.")
+@click.option('--max-seconds', type=float, default=None, help="Stop dispatching after this much wall time.")
+@click.option('--max-calls', type=int, default=None, help="Stop after this many provider calls.")
+@click.option('--max-cost', type=float, default=None, help="Stop before the estimated cost exceeds this amount.")
+@click.option('--max-error-rate', type=click.FloatRange(0, 1), default=None,
+              help="Stop when the error rate over the last --error-window items exceeds this fraction.")
+@click.option('--error-window', default=20, show_default=True, help="Items in the error-rate window.")
+@click.option('--min-error-samples', default=5, show_default=True, type=click.IntRange(min=1),
+              help="Finished items needed before the error rate is checked.")
+@click.option('--array-size', type=click.IntRange(min=8), default=None,
+              help="Also pack outputs into a memory-mapped array store at this resolution (e.g. 128).")
+@click.option('--param', '-p', 'params', multiple=True,
+              help="Sweep a plugin parameter: TOOL.KEY=V1,V2 (double-quote values containing commas; "
+                   "repeatable; grids are cartesian products).")
+def run(case_ids, tool_ids, transport, cassette_dir, replay_latency, repeats,
+        max_seconds, max_calls, max_cost, max_error_rate, error_window, min_error_samples,
+        array_size, params):
     """Run benchmark for given case and tool IDs."""
-    run_id = run_benchmark(case_ids=case_ids, tool_ids=tool_ids)
+    from benchmark.core.budget import Budget
+    from benchmark.core.params import build_grid
+    from benchmark.core.runner import run_benchmark
+    from benchmark.core.transport import get_transport
+
+    try:
+        transport_impl = get_transport(transport, cassette_dir=cassette_dir, latency=replay_latency)
+        budget = Budget.from_options({
+            'max_seconds': max_seconds,
+            'max_calls': max_calls,
+            'max_cost': max_cost,
+            'max_error_rate': max_error_rate,
+            'error_window': error_window,
+            'min_error_samples': min_error_samples,
+        })
+        param_grid = build_grid(params)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    try:
+        run_id = run_benchmark(case_ids=case_ids, tool_ids=tool_ids, transport=transport_impl, repeats=repeats,
+                               budget=budget, array_size=array_size, param_grid=param_grid)
+    except (ValueError, LookupError) as e:
+        raise click.UsageError(str(e))
     click.echo(f"Run started with ID: {run_id}")
 
+@cli.command("tools")
+@click.option('--json', 'as_json', is_flag=True, help="Print plugin metadata as JSON.")
+def tools(as_json):
+    """List registered tools without importing them."""
+    from benchmark.core.registry import list_plugins
+
+    plugins = list_plugins()
+    if as_json:
+        click.echo(json.dumps([info.to_dict() for info in plugins], indent=2))
+        return
+    for info in plugins:
+        flags = '' if info.default else ' (opt-in)'
+        click.echo(f"{info.id} {info.version} [{info.source}] "
+                   f"max_concurrency={info.max_concurrency or '-'} "
+                   f"capabilities={','.join(info.capabilities) or '-'}{flags}")
+
+@cli.command("perf")
+@click.option('--cases', default=200, show_default=True, help="Number of synthetic run items.")
+@click.option('--clients', default=50, show_default=True, help="Simulated WebSocket clients watching the run.")
+@click.option('--concurrency', default=32, show_default=True, help="Maximum concurrent items in the runner.")
+@click.option('--latency', default='lognormal:0.05,0.5', show_default=True, help="Synthetic latency distribution.")
+@click.option('--failure-rate', default=0.0, show_default=True, help="Synthetic failure probability.")
+@click.option('--output-size', default='256x256', show_default=True, help="Synthetic output size WIDTHxHEIGHT.")
+@click.option('--output', '-o', type=click.Path(dir_okay=False), default=None, help="Write JSON results to a file.")
+def perf(cases, clients, concurrency, latency, failure_rate, output_size, output):
+    """Measure framework throughput with the synthetic plugin.
+
+    Set BENCHMARK_DATABASE_URL and BENCHMARK_RUNS_DIR to keep the load runs
+    out of your main database and runs directory.
+    """
+    from benchmark.perf import run_perf
+
+    results = run_perf(cases=cases, clients=clients, concurrency=concurrency, latency=latency,
+                       failure_rate=failure_rate, output_size=output_size)
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+        click.echo(f"Perf results written to {output}")
+    else:
+        click.echo(text)
+
+@cli.command("hashes")
+@click.argument("run_id")
+@click.option('--max-distance', default=4, show_default=True, help="Hamming distance for near-duplicate groups.")
+def hashes(run_id, max_distance):
+    """Index a run's outputs by perceptual hash and list flagged and duplicate outputs."""
+    from benchmark.core.db import init_db, SessionLocal
+    from benchmark.core.hash_index import index_inputs, index_run, run_flags, group_duplicates
+    from benchmark.core.models import load_test_cases
+
+    init_db()
+    session = SessionLocal()
+    try:
+        cases = [case.dict() for case in load_test_cases()]
+        index_inputs(session, cases)
+        count = index_run(session, run_id, {c['id']: c for c in cases})
+        click.echo(f"Indexed {count} outputs for run {run_id}")
+        for row in run_flags(session, run_id):
+            click.echo(f"  flagged {row['case_id']}/{row['tool_id']}: {row['flag']}")
+        for group in group_duplicates(session, [int(run_id)], max_distance):
+            click.echo("  near-duplicates: " + ", ".join(f"{r['case_id']}/{r['tool_id']}" for r in group))
+    finally:
+        session.close()
+
+@cli.command("diff")
+@click.argument("run_a")
+@click.argument("run_b")
+@click.option('--top', default=20, show_default=True, help="Most-changed pairs to list and render heatmaps for.")
+@click.option('--size', default=128, show_default=True, help="Side of the downscaled comparison images.")
+@click.option('--workers', default=None, type=int, help="Process pool size (default: CPU count).")
+@click.option('--json', 'as_json', is_flag=True, help="Print the full ranked diff as JSON.")
+def diff(run_a, run_b, top, size, workers, as_json):
+    """Compare two runs case by case and rank the most-changed outputs."""
+    from benchmark.core.db import SessionLocal
+    from benchmark.core.diff import diff_runs
+
+    session = SessionLocal()
+    try:
+        result = diff_runs(session, run_a, run_b, size=size, top=top, workers=workers)
+    finally:
+        session.close()
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+    click.echo(f"Compared {len(result['pairs'])} pairs in {result['elapsed_s']}s "
+               f"({len(result['unmatched'])} unmatched)")
+    for pair in result['pairs'][:top]:
+        click.echo(f"{pair['rank']:>4}. {pair['case_id']}/{pair['tool_id']}: "
+                   f"ssim={pair['ssim']:.4f} pixel_delta={pair['pixel_delta']:.4f}"
+                   + (f" heatmap={pair['heatmap_url']}" if pair['heatmap_url'] else ''))
+
+@cli.command("stats")
+@click.argument("run_id")
+@click.option('--json', 'as_json', is_flag=True, help="Print per case/tool statistics as JSON.")
+def stats(run_id, as_json):
+    """Show latency and score distributions of a run's repeated trials."""
+    from benchmark.core.db import SessionLocal
+    from benchmark.core.stats import run_stats
+
+    session = SessionLocal()
+    try:
+        result = run_stats(session, run_id)
+    finally:
+        session.close()
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+
+    def _fmt(summary, unit=''):
+        if not summary.get('n'):
+            return '-'
+        text = f"mean={summary['mean']:.3f}{unit} p50={summary['p50']:.3f}{unit} p90={summary['p90']:.3f}{unit}"
+        if summary['ci95']:
+            lo, hi = summary['ci95']
+            text += f" ci95=[{lo:.3f}, {hi:.3f}]"
+        return text
+
+    for entry in result['tools']:
+        params = ' '.join(f"{k}={v}" for k, v in sorted(entry['params'].items()))
+        label = f"{entry['tool_id']} [{params}]" if params else entry['tool_id']
+        click.echo(f"{label}: {entry['completed']}/{entry['trials']} trials, {entry['errors']} errors")
+        click.echo(f"  latency: {_fmt(entry['latency'], 's')}")
+        click.echo(f"  score:   {_fmt(entry['score'])}")
+        click.echo(f"  human:   {_fmt(entry['human'])}")
+
+@cli.command("broker")
+@click.option('--address', default=None,
+              help="Listen address: unix:PATH or tcp:HOST:PORT (default: unix socket under .cache/).")
+def broker(address):
+    """Relay run progress events between web workers (BENCHMARK_EVENT_BUS=socket)."""
+    import asyncio
+    import logging
+    from benchmark.core.events import DEFAULT_SOCKET_ADDRESS, parse_address, run_broker
+
+    address = address or DEFAULT_SOCKET_ADDRESS
+    try:
+        parse_address(address)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    click.echo(f"Event broker listening on {address}")
+    try:
+        asyncio.run(run_broker(address))
+    except KeyboardInterrupt:
+        pass
+
+@cli.command("doctor")
+@click.option('--import-time', 'import_time', is_flag=True, help="Profile module import costs with -X importtime.")
+@click.option('--module', '-m', 'modules', multiple=True,
+              help="Module to profile (repeatable; default: benchmark.cli and the runner).")
+@click.option('--top', default=15, show_default=True, help="Slowest imports to list.")
+@click.option('--json', 'as_json', is_flag=True, help="Print the report as JSON.")
+def doctor(import_time, modules, top, as_json):
+    """Check the environment and optionally profile import times."""
+    from benchmark.doctor import check_environment, profile_imports, DEFAULT_PROFILE_MODULES
+
+    report = {'checks': check_environment()}
+    if import_time:
+        report['imports'] = [profile_imports(module, top=top) for module in (modules or DEFAULT_PROFILE_MODULES)]
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    for check in report['checks']:
+        mark = 'ok' if check['ok'] else ('warn' if check.get('optional') else 'FAIL')
+        click.echo(f"[{mark:>4}] {check['name']}: {check['detail']}")
+    for profile in report.get('imports', []):
+        click.echo(f"\nimport {profile['module']}: {profile['total_ms']:.1f} ms "
+                   f"({profile['modules']} modules; interpreter startup {profile['startup_ms']:.1f} ms, "
+                   f"wall {profile['wall_ms']:.1f} ms)")
+        if profile.get('error'):
+            click.echo(f"  error: {profile['error']}")
+        for entry in profile['slowest']:
+            click.echo(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['self_ms']:>8.1f} ms  {entry['name']}")
+
 @cli.command("report")
 @click.argument("run_id")
 def report(run_id):
     """Generate report for a run."""
+    from benchmark.report.report_builder import build_report
+
     report_file = build_report(run_id)
     click.echo(f"Report generated: {report_file}")
 
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -9,10 +10,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Directories
 DATASETS_DIR = BASE_DIR / "datasets"
-RUNS_DIR = BASE_DIR / "runs"
+RUNS_DIR = Path(os.getenv("BENCHMARK_RUNS_DIR", BASE_DIR / "runs"))
 
 # Test cases file
 TEST_CASES_FILE = DATASETS_DIR / "test_cases.json"
 
-# Database URL for SQLite
-DATABASE_URL = f"sqlite:///{BASE_DIR / 'benchmark.db'}"
\ No newline at end of file
+# Database URL for SQLite (override to keep scratch runs out of the main DB)
+DATABASE_URL = os.getenv("BENCHMARK_DATABASE_URL", f"sqlite:///{BASE_DIR / 'benchmark.db'}")
+
+# Recorded provider responses for offline record/replay runs
+CASSETTES_DIR = BASE_DIR / "cassettes"
+
+
+# Derived artifacts (e.g. preprocessed plugin inputs), safe to delete
+CACHE_DIR = BASE_DIR / ".cache"
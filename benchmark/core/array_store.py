@@ -0,0 +1,142 @@
+"""
+Packed per-run array store.
+
+An optional store of every output of a run as a fixed-size downscaled RGB
+tensor, so batch consumers (run diffs, hash indexing) can read outputs
+without decoding PNGs. The store lives next to the run's images:
+
+* ``runs/<run_id>/arrays.npy``: ``(capacity, size, size, 3)`` uint8 array,
+  opened as a memory map
+* ``runs/<run_id>/arrays.filled.npy``: ``(capacity,)`` uint8 flags marking
+  slots that hold an output
+* ``runs/<run_id>/arrays.json``: tensor size and the run item ID of each slot
+
+Slots are assigned to every item when the store is created, and the runner
+fills an item's slot when the item is scored. Slices of the memory map are
+views, so reading a contiguous range of slots copies nothing.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from benchmark.config import RUNS_DIR
+from benchmark.utils.image_io import downscale_rgb
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARRAY_SIZE = 128
+
+ARRAYS_FILE = 'arrays.npy'
+FILLED_FILE = 'arrays.filled.npy'
+INDEX_FILE = 'arrays.json'
+
+
+class ArrayStore:
+    """
+    Memory-mapped store of a run's downscaled outputs.
+
+    Use ``ArrayStore.create`` when a run is started and ``ArrayStore.open``
+    to read or fill it afterwards.
+    """
+
+    def __init__(self, run_dir: Path, size: int, item_ids: List[int], mode: str = 'r'):
+        self.run_dir = Path(run_dir)
+        self.size = size
+        self.item_ids = item_ids
+        self.slots: Dict[int, int] = {item_id: slot for slot, item_id in enumerate(item_ids)}
+        self.arrays = np.load(self.run_dir / ARRAYS_FILE, mmap_mode=mode)
+        self.filled = np.load(self.run_dir / FILLED_FILE, mmap_mode=mode)
+
+    @classmethod
+    def create(cls, run_id: str, item_ids: Iterable[int], size: int = DEFAULT_ARRAY_SIZE) -> 'ArrayStore':
+        """
+        Allocate the store of a run with one slot per item.
+
+        Args:
+            run_id: The run the store belongs to
+            item_ids: Run item IDs, in slot order
+            size: Side of the stored square tensors
+
+        Returns:
+            The store, opened for writing
+        """
+        run_dir = Path(RUNS_DIR) / str(run_id)
+        run_dir.mkdir(parents=True, exist_ok=True)
+        item_ids = [int(i) for i in item_ids]
+        capacity = len(item_ids)
+        # open_memmap writes the .npy header and allocates a sparse file
+        arrays = np.lib.format.open_memmap(run_dir / ARRAYS_FILE, mode='w+', dtype=np.uint8,
+                                           shape=(capacity, size, size, 3))
+        filled = np.lib.format.open_memmap(run_dir / FILLED_FILE, mode='w+', dtype=np.uint8,
+                                           shape=(capacity,))
+        del arrays, filled
+        tmp = run_dir / f"{INDEX_FILE}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'size': size, 'item_ids': item_ids}, f)
+        os.replace(tmp, run_dir / INDEX_FILE)
+        logger.info(f"Created array store for run {run_id}: {capacity} x {size}x{size}")
+        return cls(run_dir, size, item_ids, mode='r+')
+
+    @classmethod
+    def open(cls, run_id: str, writable: bool = False) -> Optional['ArrayStore']:
+        """Open a run's store, or return None if the run has none."""
+        run_dir = Path(RUNS_DIR) / str(run_id)
+        index_path = run_dir / INDEX_FILE
+        if not index_path.exists():
+            return None
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        return cls(run_dir, int(index['size']), [int(i) for i in index['item_ids']],
+                   mode='r+' if writable else 'r')
+
+    def __contains__(self, item_id: int) -> bool:
+        slot = self.slots.get(int(item_id))
+        return slot is not None and bool(self.filled[slot])
+
+    def put(self, item_id: int, image: Image.Image) -> None:
+        """Downscale an output into its item's slot."""
+        slot = self.slots.get(int(item_id))
+        if slot is None:
+            logger.warning(f"Item {item_id} has no slot in the array store of {self.run_dir.name}")
+            return
+        self.arrays[slot] = downscale_rgb(image, self.size)
+        self.filled[slot] = 1
+
+    def get(self, item_id: int) -> Optional[np.ndarray]:
+        """A read-only ``(size, size, 3)`` view of an item's output, or None if not stored."""
+        if item_id not in self:
+            return None
+        view = self.arrays[self.slots[int(item_id)]]
+        view.flags.writeable = False
+        return view
+
+    def take(self, item_ids: List[int]) -> np.ndarray:
+        """
+        Stack the outputs of several items.
+
+        Returns a view when the items occupy consecutive slots (e.g. a whole
+        run in order), and a copy otherwise.
+        """
+        slots = [self.slots[int(i)] for i in item_ids]
+        if slots and slots == list(range(slots[0], slots[0] + len(slots))):
+            return self.arrays[slots[0]:slots[0] + len(slots)]
+        return self.arrays[slots]
+
+    def stored(self) -> Tuple[List[int], np.ndarray]:
+        """IDs of the items with a stored output and the batch of those outputs."""
+        slots = np.flatnonzero(self.filled)
+        ids = [self.item_ids[s] for s in slots]
+        return ids, self.take(ids)
+
+    def flush(self) -> None:
+        """Write dirty pages to disk (readers in other processes see writes without this)."""
+        if self.arrays.mode != 'r':
+            self.arrays.flush()
+            self.filled.flush()
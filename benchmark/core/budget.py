@@ -0,0 +1,163 @@
+"""
+Per-run budgets with early stopping.
+
+A budget caps how long a run may take, how many provider calls it may make,
+their estimated cost (each tool's ``cost_per_call`` from ``PLUGIN_INFO``) and
+the error rate over a sliding window of recent items. An item counts as one
+call, or as one call per avatar of its case for tools that declare
+``calls_per_avatar`` (one prediction per face). The scheduler checks the
+budget before dispatching each item; once a limit trips, no further items are
+dispatched and the rest of the run is marked ``skipped``.
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+DEFAULT_ERROR_WINDOW = 20
+# Finished items needed before the error rate is checked, so short runs can trip it too
+DEFAULT_MIN_ERROR_SAMPLES = 5
+
+BUDGET_OPTIONS = ('max_seconds', 'max_calls', 'max_cost', 'max_error_rate', 'error_window', 'min_error_samples')
+
+
+class Budget:
+    """
+    Limits and live consumption of one run.
+
+    Args:
+        max_seconds: Maximum wall time from the first dispatch
+        max_calls: Maximum number of provider calls
+        max_cost: Maximum estimated cost of the dispatched calls
+        max_error_rate: Maximum fraction (0-1) of errors over the error window
+        error_window: Number of most recent finished items the error rate covers
+        min_error_samples: Finished items needed before the error rate is checked
+            (at most ``error_window``)
+        costs: Per-tool cost overrides of ``cost_per_call``
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_calls: Optional[int] = None,
+                 max_cost: Optional[float] = None, max_error_rate: Optional[float] = None,
+                 error_window: int = DEFAULT_ERROR_WINDOW, min_error_samples: int = DEFAULT_MIN_ERROR_SAMPLES,
+                 costs: Optional[Dict[str, float]] = None):
+        if max_error_rate is not None and not 0 <= max_error_rate <= 1:
+            raise ValueError(f"max_error_rate must be between 0 and 1, got {max_error_rate}")
+        if error_window < 1:
+            raise ValueError(f"error_window must be at least 1, got {error_window}")
+        if min_error_samples < 1:
+            raise ValueError(f"min_error_samples must be at least 1, got {min_error_samples}")
+        self.max_seconds = max_seconds
+        self.max_calls = max_calls
+        self.max_cost = max_cost
+        self.max_error_rate = max_error_rate
+        self.error_window = error_window
+        self.min_error_samples = min(min_error_samples, error_window)
+        self.costs = dict(costs or {})
+        self.started: Optional[float] = None
+        self.calls = 0
+        self.cost = 0.0
+        self.errors = 0
+        self.recent: Deque[bool] = deque(maxlen=error_window)
+        self.tripped: Optional[str] = None
+
+    @classmethod
+    def from_options(cls, options: Optional[Dict[str, Any]]) -> Optional['Budget']:
+        """
+        Build a budget from a JSON options dictionary.
+
+        Returns:
+            None when no limit is set
+        """
+        options = {k: v for k, v in (options or {}).items() if v is not None}
+        unknown = set(options) - set(BUDGET_OPTIONS) - {'costs'}
+        if unknown:
+            raise ValueError(f"Unknown budget options: {', '.join(sorted(unknown))}")
+        if not any(k in options for k in ('max_seconds', 'max_calls', 'max_cost', 'max_error_rate')):
+            return None
+        try:
+            return cls(
+                max_seconds=float(options['max_seconds']) if 'max_seconds' in options else None,
+                max_calls=int(options['max_calls']) if 'max_calls' in options else None,
+                max_cost=float(options['max_cost']) if 'max_cost' in options else None,
+                max_error_rate=float(options['max_error_rate']) if 'max_error_rate' in options else None,
+                error_window=int(options.get('error_window', DEFAULT_ERROR_WINDOW)),
+                min_error_samples=int(options.get('min_error_samples', DEFAULT_MIN_ERROR_SAMPLES)),
+                costs={k: float(v) for k, v in (options.get('costs') or {}).items()},
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid budget: {e}")
+
+    def start(self) -> None:
+        """Start the wall clock (idempotent)."""
+        if self.started is None:
+            self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    @property
+    def remaining_seconds(self) -> Optional[float]:
+        if self.max_seconds is None:
+            return None
+        return max(self.max_seconds - self.elapsed, 0.0)
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        return sum(self.recent) / len(self.recent) if self.recent else None
+
+    def call_cost(self, tool_id: str, default: Optional[float] = None) -> float:
+        """Estimated cost of one call to a tool."""
+        return float(self.costs.get(tool_id, default or 0.0))
+
+    def check(self, next_cost: float = 0.0, next_calls: int = 1) -> Optional[str]:
+        """
+        Check whether ``next_calls`` more calls costing ``next_cost`` in total fit in the budget.
+
+        Returns:
+            The reason the budget tripped, or None; a tripped budget stays tripped
+        """
+        if self.tripped:
+            return self.tripped
+        reason = None
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            reason = f"wall time {self.elapsed:.1f}s reached the {self.max_seconds:g}s limit"
+        elif self.max_calls is not None and self.calls + next_calls > self.max_calls:
+            reason = f"{self.calls} calls reached the limit of {self.max_calls}"
+        elif self.max_cost is not None and self.cost + next_cost > self.max_cost + 1e-9:
+            reason = f"estimated cost {self.cost:.4f} would exceed the limit of {self.max_cost:g}"
+        elif (self.max_error_rate is not None and len(self.recent) >= self.min_error_samples
+              and self.error_rate > self.max_error_rate):
+            reason = (f"error rate {self.error_rate:.0%} over the last {len(self.recent)} items "
+                      f"exceeded {self.max_error_rate:.0%}")
+        self.tripped = reason
+        return reason
+
+    def record_call(self, cost: float = 0.0, calls: int = 1) -> None:
+        """Count the calls of a dispatched item and their total cost."""
+        self.calls += calls
+        self.cost += cost
+
+    def record_result(self, error: bool) -> None:
+        """Record whether a finished item failed."""
+        self.errors += int(error)
+        self.recent.append(bool(error))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the limits and consumption as a JSON-serializable dictionary."""
+        return {
+            'limits': {
+                'max_seconds': self.max_seconds,
+                'max_calls': self.max_calls,
+                'max_cost': self.max_cost,
+                'max_error_rate': self.max_error_rate,
+                'error_window': self.error_window,
+                'min_error_samples': self.min_error_samples,
+            },
+            'elapsed_s': round(self.elapsed, 3),
+            'calls': self.calls,
+            'cost': round(self.cost, 6),
+            'errors': self.errors,
+            'error_rate': round(self.error_rate, 4) if self.error_rate is not None else None,
+            'tripped': self.tripped,
+        }
@@ -0,0 +1,9 @@
+"""
+Constants shared by the CLI and the core modules.
+
+This module must stay free of imports so the CLI can use it without loading
+the heavy core modules.
+"""
+
+# How plugin calls are made (see ``benchmark.core.transport``)
+TRANSPORT_MODES = ("live", "record", "replay")
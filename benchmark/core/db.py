@@ -1,17 +1,51 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from benchmark.config import DATABASE_URL
 from benchmark.core.models import Base
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# The engine and session factory are created on first use, so importing this
+# module (e.g. from the CLI) does not open the database
+_engine = None
+_session_factory = None
 
-# Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine():
+    """Return the SQLAlchemy engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False}
+        )
+    return _engine
+
+def SessionLocal(**kwargs):
+    """Create a database session (the configured "Session" class is built lazily)."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory(**kwargs)
+
+def __getattr__(name):
+    # Keep ``from benchmark.core.db import engine`` working
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _add_missing_columns():
+    """Add columns introduced after a table was first created (SQLite has no migrations here)."""
+    engine = get_engine()
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
 
 def init_db():
     """Initialize the database and create tables."""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=get_engine())
+    _add_missing_columns()
@@ -0,0 +1,244 @@
+"""
+Run-to-run visual diff for regression detection.
+
+Items of two runs are paired by ``(case_id, tool_id, trial, params)``. Each pair is
+downscaled and compared with NumPy in batches spread over a process pool:
+the mean absolute pixel delta and a windowed SSIM are computed for a whole
+batch at once. Pairs are ranked by how much they changed, and heatmap
+thumbnails (run A | run B | difference) are written for the most-changed
+pairs under ``RUNS_DIR/diffs/<run_a>_vs_<run_b>/``.
+
+When both runs have a packed array store at the requested size, pairs whose
+outputs are stored are compared straight from the memory maps, without
+decoding PNGs or starting worker processes.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from benchmark.config import RUNS_DIR
+from benchmark.core.array_store import ArrayStore
+from benchmark.core.models import RunItem, item_image_path
+from benchmark.core.params import load_params, params_slug
+from benchmark.utils.image_io import downscale_rgb
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 128
+DEFAULT_BATCH_SIZE = 64
+SSIM_WINDOW = 7
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def load_downscaled(path: str, size: int = DEFAULT_SIZE) -> np.ndarray:
+    """Load an image as a ``(size, size, 3)`` uint8 array."""
+    with Image.open(path) as img:
+        return downscale_rgb(img, size)
+
+
+def _box_mean(a: np.ndarray, k: int) -> np.ndarray:
+    """Mean over every k x k window of a ``(B, H, W)`` stack, via integral images."""
+    c = np.pad(a, ((0, 0), (1, 0), (1, 0))).cumsum(axis=1).cumsum(axis=2)
+    s = c[:, k:, k:] - c[:, :-k, k:] - c[:, k:, :-k] + c[:, :-k, :-k]
+    return s / (k * k)
+
+
+def ssim_batch(x: np.ndarray, y: np.ndarray, window: int = SSIM_WINDOW) -> np.ndarray:
+    """
+    Mean SSIM of each pair in a batch of grayscale images.
+
+    Args:
+        x: ``(B, H, W)`` float array with values in [0, 255]
+        y: Array of the same shape
+        window: Side of the uniform SSIM window
+
+    Returns:
+        ``(B,)`` array of SSIM values
+    """
+    mu_x = _box_mean(x, window)
+    mu_y = _box_mean(y, window)
+    sxx = _box_mean(x * x, window) - mu_x * mu_x
+    syy = _box_mean(y * y, window) - mu_y * mu_y
+    sxy = _box_mean(x * y, window) - mu_x * mu_y
+    num = (2 * mu_x * mu_y + _C1) * (2 * sxy + _C2)
+    den = (mu_x * mu_x + mu_y * mu_y + _C1) * (sxx + syy + _C2)
+    return (num / den).mean(axis=(1, 2))
+
+
+def _to_gray(batch: np.ndarray) -> np.ndarray:
+    """ITU-R 601 luma of a ``(B, H, W, 3)`` batch."""
+    return batch @ np.array([0.299, 0.587, 0.114])
+
+
+def compare_arrays(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compare two aligned batches of RGB images.
+
+    Args:
+        a: ``(B, H, W, 3)`` uint8 batch
+        b: Batch of the same shape
+
+    Returns:
+        Per-pair mean absolute pixel delta (0-1) and SSIM
+    """
+    fa = a.astype(np.float64)
+    fb = b.astype(np.float64)
+    pixel_delta = np.abs(fa - fb).mean(axis=(1, 2, 3)) / 255.0
+    return pixel_delta, ssim_batch(_to_gray(fa), _to_gray(fb))
+
+
+def _diff_batch(pairs: Sequence[Tuple[str, str]], size: int) -> List[Tuple[float, float]]:
+    """Process-pool worker: load and compare a batch of image path pairs."""
+    a = np.stack([load_downscaled(pa, size) for pa, _ in pairs])
+    b = np.stack([load_downscaled(pb, size) for _, pb in pairs])
+    pixel_delta, ssim = compare_arrays(a, b)
+    return list(zip(pixel_delta.tolist(), ssim.tolist()))
+
+
+def write_heatmap(path_a: str, path_b: str, out_path: Path, size: int = DEFAULT_SIZE,
+                  a: Optional[np.ndarray] = None, b: Optional[np.ndarray] = None) -> None:
+    """
+    Write a thumbnail strip: run A, run B and a red heatmap of their difference.
+
+    ``a`` and ``b`` may supply the downscaled images (e.g. from an array store)
+    instead of loading them from the paths.
+    """
+    a = load_downscaled(path_a, size) if a is None else a
+    b = load_downscaled(path_b, size) if b is None else b
+    delta = np.abs(a.astype(np.int16) - b.astype(np.int16)).mean(axis=2)
+    peak = delta.max() or 1.0
+    heat = np.zeros_like(a)
+    gray = _to_gray(b[None].astype(np.float64))[0] * 0.4
+    heat[..., 0] = np.clip(gray + delta / peak * 255 * 0.6, 0, 255)
+    heat[..., 1] = gray
+    heat[..., 2] = gray
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(np.concatenate([a, b, heat], axis=1)).save(out_path)
+
+
+def pair_items(session, run_a: str, run_b: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Pair the outputs of two runs by case, tool, trial and sweep parameters.
+
+    Returns:
+        Matched pairs with both image paths, and items present on only one side
+    """
+    def _outputs(run_id):
+        items = session.query(RunItem).filter_by(run_id=int(run_id)).all()
+        result = {}
+        for item in items:
+            path = item_image_path(item)
+            if path is not None and path.exists():
+                result[(item.case_id, item.tool_id, item.trial or 0, item.params or '')] = (item, str(path))
+        return result
+
+    outputs_a, outputs_b = _outputs(run_a), _outputs(run_b)
+    pairs, unmatched = [], []
+    for key in sorted(set(outputs_a) | set(outputs_b)):
+        if key in outputs_a and key in outputs_b:
+            (item_a, path_a), (item_b, path_b) = outputs_a[key], outputs_b[key]
+            pairs.append({
+                'case_id': key[0],
+                'tool_id': key[1],
+                'trial': key[2],
+                'params': load_params(key[3]),
+                'item_a': item_a.id,
+                'item_b': item_b.id,
+                'path_a': path_a,
+                'path_b': path_b,
+            })
+        else:
+            unmatched.append({'case_id': key[0], 'tool_id': key[1], 'trial': key[2],
+                              'params': load_params(key[3]),
+                              'run_id': str(run_a if key in outputs_a else run_b)})
+    return pairs, unmatched
+
+
+def diff_runs(session, run_a: str, run_b: str, size: int = DEFAULT_SIZE, top: int = 20,
+              workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Compare two runs and rank the pairs by how much they changed.
+
+    Args:
+        session: Database session
+        run_a: Baseline run ID
+        run_b: Run to compare against the baseline
+        size: Side of the downscaled comparison images
+        top: Number of most-changed pairs that get heatmap thumbnails
+        workers: Process pool size (defaults to the CPU count)
+        batch_size: Pairs per worker batch
+
+    Returns:
+        A dictionary with the ranked pairs, unmatched items and timing
+    """
+    start = time.perf_counter()
+    pairs, unmatched = pair_items(session, run_a, run_b)
+
+    # Pairs with both outputs in array stores of this size skip PNG decoding
+    store_a, store_b = ArrayStore.open(run_a), ArrayStore.open(run_b)
+    if store_a is None or store_b is None or store_a.size != size or store_b.size != size:
+        store_a = store_b = None
+
+    def _in_stores(pair):
+        return store_a is not None and pair['item_a'] in store_a and pair['item_b'] in store_b
+
+    stored = [p for p in pairs if _in_stores(p)]
+    decoded = [p for p in pairs if not _in_stores(p)]
+
+    results = []
+    for i in range(0, len(stored), batch_size):
+        batch = stored[i:i + batch_size]
+        pixel_delta, ssim = compare_arrays(store_a.take([p['item_a'] for p in batch]),
+                                           store_b.take([p['item_b'] for p in batch]))
+        results.extend(zip(pixel_delta.tolist(), ssim.tolist()))
+
+    path_pairs = [(p['path_a'], p['path_b']) for p in decoded]
+    batches = [path_pairs[i:i + batch_size] for i in range(0, len(path_pairs), batch_size)]
+    if len(batches) <= 1:
+        results.extend(r for batch in batches for r in _diff_batch(batch, size))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results.extend(r for batch_result in pool.map(_diff_batch, batches, [size] * len(batches))
+                           for r in batch_result)
+
+    pairs = stored + decoded
+    for pair, (pixel_delta, ssim) in zip(pairs, results):
+        pair['pixel_delta'] = round(pixel_delta, 6)
+        pair['ssim'] = round(ssim, 6)
+        pair['change'] = round(1.0 - ssim, 6)
+    pairs.sort(key=lambda p: (p['change'], p['pixel_delta']), reverse=True)
+
+    heatmap_dir = Path(RUNS_DIR) / 'diffs' / f"{run_a}_vs_{run_b}"
+    for rank, pair in enumerate(pairs, start=1):
+        pair['rank'] = rank
+        pair['heatmap_url'] = None
+        if rank <= top and pair['change'] > 0:
+            slug = params_slug(pair['params'])
+            name = f"{pair['case_id']}__{pair['tool_id']}{'__' + slug if slug else ''}__t{pair['trial']}.png"
+            arrays = {}
+            if _in_stores(pair):
+                arrays = {'a': store_a.get(pair['item_a']), 'b': store_b.get(pair['item_b'])}
+            write_heatmap(pair['path_a'], pair['path_b'], heatmap_dir / name, size, **arrays)
+            pair['heatmap_url'] = f"/runs/diffs/{run_a}_vs_{run_b}/{name}"
+        del pair['path_a'], pair['path_b']
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Diffed {len(pairs)} pairs of runs {run_a} and {run_b} in {elapsed:.2f}s")
+    return {
+        'run_a': str(run_a),
+        'run_b': str(run_b),
+        'size': size,
+        'pairs': pairs,
+        'unmatched': unmatched,
+        'from_array_store': len(stored),
+        'elapsed_s': round(elapsed, 3),
+    }
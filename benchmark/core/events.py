@@ -0,0 +1,383 @@
+"""
+Event bus for run progress.
+
+The scheduler publishes progress events (item updates, run state, ratings)
+to a bus instead of straight to the WebSocket manager. Every web worker
+subscribes to the bus and fans events out to its own sockets. Clients then
+see every run's progress no matter which worker they are connected to or
+where the run executes.
+
+Backends, selected with ``BENCHMARK_EVENT_BUS``:
+
+* ``sqlite[:PATH]``: events are appended to a SQLite table that every
+  subscriber polls; works across processes on one host (the default)
+* ``memory``: in-process delivery (single worker only)
+* ``socket[:ADDRESS]``: a broker (``python -m benchmark.cli broker``) relays
+  events between connected workers over a Unix socket (``unix:PATH``) or
+  TCP (``tcp:HOST:PORT``)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmark.config import CACHE_DIR
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+BUS_KINDS = ('memory', 'sqlite', 'socket')
+DEFAULT_SQLITE_PATH = CACHE_DIR / "events.db"
+DEFAULT_SOCKET_ADDRESS = f"unix:{CACHE_DIR / 'events.sock'}"
+
+
+def _encode(message: Dict[str, Any]) -> str:
+    return json.dumps(message, default=str, separators=(',', ':'))
+
+
+class EventBus:
+    """
+    Base event bus: publish messages, deliver them to subscribed handlers.
+
+    ``broadcast`` is an alias of ``publish`` so a bus can stand in for the
+    WebSocket manager wherever progress events are sent.
+    """
+
+    # Whether other processes receive the published messages
+    shared = True
+
+    def __init__(self):
+        self.handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        """Register an async handler called with every message."""
+        self.handlers.append(handler)
+
+    async def start(self) -> None:
+        """Start delivering messages to the subscribed handlers."""
+
+    async def stop(self) -> None:
+        """Stop delivery and release resources."""
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        await self.publish(message)
+
+    async def _deliver(self, message: Dict[str, Any]) -> None:
+        for handler in list(self.handlers):
+            try:
+                await handler(message)
+            except Exception:
+                logger.exception("Event handler failed")
+
+
+class MemoryBus(EventBus):
+    """Deliver messages to handlers in the same process."""
+
+    shared = False
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        await self._deliver(message)
+
+
+class SQLiteBus(EventBus):
+    """
+    Event log in a SQLite table, polled by every subscriber.
+
+    Published messages are buffered and written in batches, one transaction
+    per batch. Subscribers start at the end of the log, so only events
+    published after ``start()`` are delivered. Rows older than ``retention``
+    seconds are pruned.
+
+    Args:
+        path: SQLite database file shared by all workers
+        poll_interval: Seconds between polls for new events
+        retention: Seconds events are kept
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 0.05, retention: float = 300.0):
+        super().__init__()
+        self.path = Path(path or DEFAULT_SQLITE_PATH)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.last_id = 0
+        self._pending: List[str] = []
+        self._flushing: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        # The connection is shared by worker threads; one statement batch at a time
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    async def start(self) -> None:
+        self.last_id = await asyncio.to_thread(self._max_id)
+        if self.handlers and self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poller:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        if self._flushing:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        if self._pending:
+            await self._flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        self._pending.append(_encode(message))
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        # Let other publishers in the same loop iteration join the batch
+        await asyncio.sleep(0)
+        while self._pending:
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, batch)
+
+    def _max_id(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT MAX(id) FROM events").fetchone()[0] or 0
+
+    def _write(self, batch: List[str]) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT INTO events (created, payload) VALUES (?, ?)",
+                             [(now, payload) for payload in batch])
+
+    def _read(self, after: int) -> List[Tuple[int, str]]:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT id, payload FROM events WHERE id > ? ORDER BY id", (after,)).fetchall()
+            if rows and rows[-1][0] % 1000 < len(rows):
+                # Roughly every thousand events, drop the expired ones
+                with conn:
+                    conn.execute("DELETE FROM events WHERE created < ?", (time.time() - self.retention,))
+        return rows
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._read, self.last_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Event bus poll failed: {e}")
+                rows = []
+            for event_id, payload in rows:
+                self.last_id = event_id
+                await self._deliver(json.loads(payload))
+            await asyncio.sleep(self.poll_interval)
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """
+    Parse a broker address.
+
+    Returns:
+        ``('unix', path)`` or ``('tcp', (host, port))``
+
+    Raises:
+        ValueError: If the address is not ``unix:PATH`` or ``tcp:HOST:PORT``
+    """
+    kind, _, rest = address.partition(':')
+    if kind == 'unix' and rest:
+        return 'unix', rest
+    if kind == 'tcp':
+        host, _, port = rest.rpartition(':')
+        if host and port.isdigit():
+            return 'tcp', (host, int(port))
+    raise ValueError(f"Invalid broker address {address!r}; expected unix:PATH or tcp:HOST:PORT")
+
+
+async def _open(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    kind, target = parse_address(address)
+    if kind == 'unix':
+        return await asyncio.open_unix_connection(target)
+    return await asyncio.open_connection(*target)
+
+
+class SocketBus(EventBus):
+    """
+    Client of the event broker.
+
+    Messages are sent to the broker as JSON lines, and the broker relays
+    every line to all connected clients (including the sender). The client
+    reconnects with backoff if the broker goes away; messages published while
+    disconnected are dropped.
+
+    Args:
+        address: Broker address (``unix:PATH`` or ``tcp:HOST:PORT``)
+    """
+
+    def __init__(self, address: Optional[str] = None):
+        super().__init__()
+        self.address = address or DEFAULT_SOCKET_ADDRESS
+        parse_address(self.address)
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._reader_task: Optional[asyncio.Task] = None
+        self._dropped = 0
+
+    async def start(self) -> None:
+        if self._reader_task is None:
+            self._reader_task = asyncio.create_task(self._run())
+            try:
+                await asyncio.wait_for(self._connected.wait(), timeout=2.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"Event broker at {self.address} not reachable yet; retrying in the background")
+
+    async def stop(self) -> None:
+        if self._reader_task:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        writer = self._writer
+        if writer is None:
+            self._dropped += 1
+            if self._dropped in (1, 100) or self._dropped % 1000 == 0:
+                logger.warning(f"Event broker unavailable; dropped {self._dropped} events")
+            return
+        writer.write(_encode(message).encode() + b'\n')
+        await writer.drain()
+
+    async def _run(self) -> None:
+        delay = 0.1
+        while True:
+            try:
+                reader, writer = await _open(self.address)
+            except OSError as e:
+                logger.debug(f"Could not connect to event broker at {self.address}: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+            delay = 0.1
+            self._writer = writer
+            self._connected.set()
+            logger.info(f"Connected to event broker at {self.address}")
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    await self._deliver(message)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            logger.warning(f"Lost connection to event broker at {self.address}; reconnecting")
+
+
+async def run_broker(address: Optional[str] = None, ready: Optional[asyncio.Event] = None) -> None:
+    """
+    Relay JSON lines between all connected clients until cancelled.
+
+    Args:
+        address: Address to listen on (``unix:PATH`` or ``tcp:HOST:PORT``)
+        ready: Optional event set once the broker is listening
+    """
+    address = address or DEFAULT_SOCKET_ADDRESS
+    kind, target = parse_address(address)
+    clients: Dict[asyncio.StreamWriter, asyncio.Queue] = {}
+
+    async def _pump(writer: asyncio.StreamWriter, queue: asyncio.Queue) -> None:
+        while True:
+            line = await queue.get()
+            writer.write(line)
+            await writer.drain()
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # One queue per client so a slow client does not hold up the others
+        queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        clients[writer] = queue
+        pump = asyncio.create_task(_pump(writer, queue))
+        logger.info(f"Broker client connected ({len(clients)} total)")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for other in list(clients.values()):
+                    if other.full():
+                        logger.warning("Broker client queue full; dropping event")
+                        continue
+                    other.put_nowait(line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            clients.pop(writer, None)
+            pump.cancel()
+            writer.close()
+            logger.info(f"Broker client disconnected ({len(clients)} remaining)")
+
+    if kind == 'unix':
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(target):
+            os.unlink(target)
+        server = await asyncio.start_unix_server(_handle, target)
+    else:
+        server = await asyncio.start_server(_handle, *target)
+    logger.info(f"Event broker listening on {address}")
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def get_event_bus(spec: Optional[str] = None) -> EventBus:
+    """
+    Create the event bus described by ``spec``.
+
+    Args:
+        spec: ``memory``, ``sqlite[:PATH]`` or ``socket[:ADDRESS]``;
+            defaults to ``BENCHMARK_EVENT_BUS`` (``sqlite`` when unset)
+
+    Raises:
+        ValueError: If the bus kind is unknown
+    """
+    spec = spec or os.getenv("BENCHMARK_EVENT_BUS") or "sqlite"
+    kind, _, arg = spec.partition(':')
+    if kind == 'memory':
+        return MemoryBus()
+    if kind == 'sqlite':
+        return SQLiteBus(arg or None)
+    if kind == 'socket':
+        return SocketBus(arg or None)
+    raise ValueError(f"Unknown event bus {spec!r}; expected one of {', '.join(BUS_KINDS)}")
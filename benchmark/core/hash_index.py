@@ -0,0 +1,266 @@
+"""
+Perceptual-hash index over benchmark inputs and outputs.
+
+Every saved output (and the inputs it was generated from) gets a dHash row in
+the ``image_hashes`` table. The index is used to:
+
+* flag outputs that are essentially the unchanged template
+  (``unchanged_template``) or the runner's gray error placeholder
+  (``error_placeholder``),
+* group near-duplicate outputs across tools and runs,
+* answer "which images look like this one" queries.
+
+All comparisons are Hamming distances between 64-bit hashes, so checking
+every pair of a large run takes milliseconds instead of pixel comparisons.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageStat
+
+from benchmark.core.array_store import ArrayStore
+from benchmark.core.models import ImageHash, RunItem, item_image_path
+from benchmark.utils.phash import HASH_BITS, dhash, file_dhash, from_hex, hamming, to_hex
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Maximum Hamming distance (of 64 bits) for an output to count as a copy
+FLAG_DISTANCE = 6
+# Default distance for near-duplicate grouping and similarity queries
+DUPLICATE_DISTANCE = 4
+
+# The runner and plugins render failures on a flat (200, 200, 200) canvas
+PLACEHOLDER_COLOR = (200, 200, 200)
+PLACEHOLDER_HASH = dhash(Image.new('RGB', (512, 512), color=PLACEHOLDER_COLOR))
+# Any flat image or left-to-right brightening has the placeholder's dHash (0), so the
+# canvas colour is checked too: the median must be the canvas colour and the error
+# text may only move the mean a little
+PLACEHOLDER_MEDIAN_TOLERANCE = 4
+PLACEHOLDER_MEAN_TOLERANCE = 12
+
+
+def on_placeholder_canvas(image: Image.Image) -> bool:
+    """Whether an image is mostly the flat gray canvas of the error placeholder."""
+    stat = ImageStat.Stat(image.convert('RGB').resize((64, 64), Image.BILINEAR))
+    return (all(abs(m - c) <= PLACEHOLDER_MEDIAN_TOLERANCE for m, c in zip(stat.median, PLACEHOLDER_COLOR))
+            and all(abs(m - c) <= PLACEHOLDER_MEAN_TOLERANCE for m, c in zip(stat.mean, PLACEHOLDER_COLOR)))
+
+
+def classify_output(output_hash: int, template_hash: Optional[int] = None,
+                    max_distance: int = FLAG_DISTANCE, placeholder_canvas: bool = False) -> Optional[str]:
+    """
+    Flag an output that looks like a failed swap.
+
+    Args:
+        output_hash: dHash of the output image
+        template_hash: dHash of the template it was generated from
+        max_distance: Maximum Hamming distance for a match
+        placeholder_canvas: Whether the output's colours match the placeholder
+            canvas (see ``on_placeholder_canvas``); required for ``error_placeholder``
+
+    Returns:
+        ``error_placeholder``, ``unchanged_template`` or None
+    """
+    if placeholder_canvas and hamming(output_hash, PLACEHOLDER_HASH) <= max_distance:
+        return 'error_placeholder'
+    if template_hash is not None and hamming(output_hash, template_hash) <= max_distance:
+        return 'unchanged_template'
+    return None
+
+
+def upsert_hash(session, path: str, value: int, kind: str, **fields) -> ImageHash:
+    """Insert or update the index row for an image path (not committed)."""
+    row = session.query(ImageHash).filter_by(path=path).first()
+    if row is None:
+        row = ImageHash(path=path)
+        session.add(row)
+    row.kind = kind
+    row.dhash = to_hex(value)
+    for key, val in fields.items():
+        setattr(row, key, val)
+    return row
+
+
+def hash_output(image: Image.Image, template_path: Optional[str]) -> Tuple[int, Optional[int], bool]:
+    """
+    Hash an output image and its template.
+
+    CPU-bound; call from a worker thread inside the event loop.
+
+    Returns:
+        The output hash, the template hash (None without a template) and
+        whether the output is on the placeholder canvas
+    """
+    template_hash = None
+    if template_path and Path(template_path).exists():
+        template_hash = file_dhash(template_path)
+    return dhash(image), template_hash, on_placeholder_canvas(image)
+
+
+def record_output(session, item: RunItem, path: str, output_hash: int,
+                  template_path: Optional[str], template_hash: Optional[int],
+                  placeholder_canvas: bool = False) -> Optional[str]:
+    """
+    Index an output (and its template) and return the output's flag.
+
+    Rows are added to the session but not committed.
+    """
+    if template_hash is not None:
+        upsert_hash(session, str(template_path), template_hash, 'template', case_id=item.case_id)
+    flag = classify_output(output_hash, template_hash, placeholder_canvas=placeholder_canvas)
+    upsert_hash(session, path, output_hash, 'output', run_id=item.run_id, run_item_id=item.id,
+                case_id=item.case_id, tool_id=item.tool_id, flag=flag)
+    if flag:
+        logger.warning(f"Output for {item.case_id}/{item.tool_id} (item {item.id}) flagged: {flag}")
+    return flag
+
+
+def index_inputs(session, cases: Iterable[Dict[str, Any]]) -> int:
+    """Index the template and avatar images of test cases; returns rows written."""
+    count = 0
+    for case in cases:
+        template = case.get('template_image')
+        if template and Path(template).exists():
+            upsert_hash(session, template, file_dhash(template), 'template', case_id=case.get('id'))
+            count += 1
+        for avatar in case.get('avatars') or []:
+            if avatar and Path(avatar).exists():
+                upsert_hash(session, avatar, file_dhash(avatar), 'avatar', case_id=case.get('id'))
+                count += 1
+    session.commit()
+    return count
+
+
+def index_run(session, run_id: str, cases_by_id: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+    """
+    Hash and flag every saved output of a run (e.g. runs made before the index existed).
+
+    Outputs held in the run's array store are hashed from the stored
+    thumbnail instead of decoding the PNG.
+
+    Returns:
+        Number of outputs indexed
+    """
+    cases_by_id = cases_by_id or {}
+    store = ArrayStore.open(run_id)
+    count = 0
+    for item in session.query(RunItem).filter_by(run_id=int(run_id)).all():
+        path = item_image_path(item)
+        if path is None or not path.exists():
+            continue
+        template = cases_by_id.get(item.case_id, {}).get('template_image')
+        template_hash = file_dhash(template) if template and Path(template).exists() else None
+        if store is not None and item.id in store:
+            image = Image.fromarray(store.get(item.id))
+        else:
+            image = Image.open(path)
+        with image:
+            output_hash, canvas = dhash(image), on_placeholder_canvas(image)
+        record_output(session, item, str(path), output_hash, template, template_hash, canvas)
+        count += 1
+    session.commit()
+    return count
+
+
+def _load(session, run_ids: Optional[List[int]] = None, kind: Optional[str] = None) -> List[ImageHash]:
+    query = session.query(ImageHash)
+    if run_ids:
+        query = query.filter(ImageHash.run_id.in_(run_ids))
+    if kind:
+        query = query.filter_by(kind=kind)
+    return query.all()
+
+
+def _row_dict(row: ImageHash, **extra) -> Dict[str, Any]:
+    data = {
+        'path': row.path,
+        'kind': row.kind,
+        'run_id': row.run_id,
+        'run_item_id': row.run_item_id,
+        'case_id': row.case_id,
+        'tool_id': row.tool_id,
+        'dhash': row.dhash,
+        'flag': row.flag,
+    }
+    data.update(extra)
+    return data
+
+
+def find_similar(session, value: int, max_distance: int = DUPLICATE_DISTANCE,
+                 kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Find indexed images within ``max_distance`` of a hash, nearest first.
+    """
+    matches = []
+    for row in _load(session, kind=kind):
+        distance = hamming(value, from_hex(row.dhash))
+        if distance <= max_distance:
+            matches.append((distance, row))
+    matches.sort(key=lambda m: m[0])
+    return [_row_dict(row, distance=distance) for distance, row in matches[:limit]]
+
+
+def group_duplicates(session, run_ids: Optional[List[int]] = None,
+                     max_distance: int = DUPLICATE_DISTANCE) -> List[List[Dict[str, Any]]]:
+    """
+    Group near-duplicate outputs across tools and runs.
+
+    Candidate pairs come from multi-index hashing: the 64 bits are split into
+    ``max_distance + 1`` bands, and any two hashes within ``max_distance``
+    must agree exactly on at least one band, so only rows sharing a band are
+    compared. Identical hashes (e.g. many error placeholders) are collapsed
+    first, so each distinct pair is compared once.
+
+    Returns:
+        Groups of two or more outputs, largest first
+
+    Raises:
+        ValueError: If ``max_distance`` is outside 0-64
+    """
+    if not 0 <= max_distance <= HASH_BITS:
+        raise ValueError(f"max_distance must be between 0 and {HASH_BITS}, got {max_distance}")
+    rows = _load(session, run_ids=run_ids, kind='output')
+    rows_by_hash: Dict[int, List[ImageHash]] = {}
+    for row in rows:
+        rows_by_hash.setdefault(from_hex(row.dhash), []).append(row)
+    hashes = list(rows_by_hash)
+    bands = min(max_distance + 1, HASH_BITS)
+    width = -(-HASH_BITS // bands)
+    mask = (1 << width) - 1
+
+    parent = list(range(len(hashes)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets: Dict[int, List[int]] = {}
+        for i, value in enumerate(hashes):
+            buckets.setdefault((value >> (band * width)) & mask, []).append(i)
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    i, j = members[a], members[b]
+                    if find(i) != find(j) and hamming(hashes[i], hashes[j]) <= max_distance:
+                        parent[find(i)] = find(j)
+
+    groups: Dict[int, List[ImageHash]] = {}
+    for i, value in enumerate(hashes):
+        groups.setdefault(find(i), []).extend(rows_by_hash[value])
+    result = [[_row_dict(r) for r in members] for members in groups.values() if len(members) > 1]
+    result.sort(key=len, reverse=True)
+    return result
+
+
+def run_flags(session, run_id: str) -> List[Dict[str, Any]]:
+    """Flagged outputs of a run."""
+    rows = session.query(ImageHash).filter(
+        ImageHash.run_id == int(run_id), ImageHash.flag.isnot(None)
+    ).all()
+    return [_row_dict(r) for r in rows]
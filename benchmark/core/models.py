@@ -1,11 +1,12 @@
 import json
 import datetime
+from pathlib import Path
 from typing import List, Optional
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from benchmark.config import TEST_CASES_FILE
+from benchmark.config import TEST_CASES_FILE, RUNS_DIR
 
 # Pydantic model for test cases
 class TestCase(BaseModel):
@@ -40,6 +41,10 @@ class RunItem(Base):
     status = Column(String)
     image_url = Column(String)
     score = Column(String)
+    trial = Column(Integer, default=0)
+    latency = Column(Float)
+    # Plugin parameters of a sweep grid point (canonical JSON), if any
+    params = Column(String, nullable=True)
     run = relationship('Run', back_populates='items')
 
 class HumanScore(Base):
@@ -47,4 +52,24 @@ class HumanScore(Base):
     id = Column(Integer, primary_key=True)
     run_item_id = Column(Integer, ForeignKey('run_items.id'))
     stars = Column(Integer)
-    run_item = relationship('RunItem')
\ No newline at end of file
+    run_item = relationship('RunItem')
+
+class ImageHash(Base):
+    __tablename__ = 'image_hashes'
+    id = Column(Integer, primary_key=True)
+    path = Column(String, unique=True, index=True)
+    kind = Column(String)
+    run_id = Column(Integer, ForeignKey('runs.id'), nullable=True, index=True)
+    run_item_id = Column(Integer, ForeignKey('run_items.id'), nullable=True, index=True)
+    case_id = Column(String)
+    tool_id = Column(String)
+    dhash = Column(String(16), index=True)
+    flag = Column(String, nullable=True)
+    run_item = relationship('RunItem')
+
+
+def item_image_path(item: RunItem) -> Optional[Path]:
+    """Filesystem path of a run item's output image, if it has one."""
+    if not item.image_url or not item.image_url.startswith('/runs/'):
+        return None
+    return Path(RUNS_DIR) / item.image_url[len('/runs/'):]
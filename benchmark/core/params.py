@@ -0,0 +1,123 @@
+"""
+Plugin parameters and parameter-sweep grids.
+
+A run may define a grid per tool, mapping parameter names to the values to
+try, e.g. ``{"synthetic": {"latency": ["fixed:0.1", "fixed:0.5"]}}``. The
+grid is expanded to the cartesian product of its values and every grid point
+becomes its own set of run items. Each item stores its parameters (as
+canonical JSON), and the runner passes them to plugins that declare the
+``params`` capability. Plugins may also define ``validate_params(params)``,
+which ``start_run`` calls for every grid point before the run is created.
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+ParamGrid = Dict[str, Dict[str, List[Any]]]
+
+
+def expand_grid(grid: Optional[Dict[str, List[Any]]]) -> List[Dict[str, Any]]:
+    """
+    Expand one tool's grid into its grid points.
+
+    Repeated values of a parameter are dropped, so every grid point is distinct.
+
+    Returns:
+        One parameter dictionary per combination (``[{}]`` for an empty grid)
+    """
+    if not grid:
+        return [{}]
+    keys = sorted(grid)
+    values = []
+    for key in keys:
+        options = grid[key] if isinstance(grid[key], (list, tuple)) else [grid[key]]
+        if not options:
+            raise ValueError(f"Parameter {key!r} has no values")
+        # Compared by their JSON encoding, so 0, 0.0 and False stay distinct
+        unique = {}
+        for option in options:
+            unique.setdefault(json.dumps(option, sort_keys=True, default=str), option)
+        values.append(list(unique.values()))
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def params_key(params: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Canonical JSON of a parameter set (None when empty), used for storage and grouping."""
+    if not params:
+        return None
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+
+def load_params(value: Optional[str]) -> Dict[str, Any]:
+    """Parse stored parameters."""
+    return json.loads(value) if value else {}
+
+
+def params_slug(params: Optional[Dict[str, Any]]) -> str:
+    """Short stable tag of a parameter set for file names (empty when no parameters)."""
+    key = params_key(params)
+    if key is None:
+        return ''
+    return 'p' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+
+
+def parse_value(text: str) -> Any:
+    """Interpret a command-line value as JSON (numbers, booleans, ...) or else a string."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def split_values(text: str) -> List[Any]:
+    """
+    Split a command-line value list.
+
+    Values are separated by commas; a value containing commas is written in
+    double quotes (``"uniform:0.1,0.2",fixed:0.1``). A JSON array is taken
+    as the list itself.
+
+    Raises:
+        ValueError: If the list is empty or malformed
+    """
+    if text.lstrip().startswith('['):
+        try:
+            values = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON value list {text!r}: {e}")
+        if not isinstance(values, list):
+            raise ValueError(f"Invalid JSON value list {text!r}")
+    else:
+        try:
+            values = [parse_value(v) for v in next(csv.reader([text], strict=True))]
+        except (csv.Error, StopIteration) as e:
+            raise ValueError(f"Invalid value list {text!r}: {e}")
+    if not values or any(v == '' for v in values):
+        raise ValueError(f"Empty value in {text!r}")
+    return values
+
+
+def parse_param_option(option: str) -> Tuple[str, str, List[Any]]:
+    """
+    Parse a ``tool.key=v1,v2`` command-line parameter (see ``split_values``).
+
+    Raises:
+        ValueError: If the option is malformed
+    """
+    target, sep, values = option.partition('=')
+    tool_id, dot, key = target.partition('.')
+    if not sep or not dot or not tool_id or not key or not values:
+        raise ValueError(f"Invalid parameter {option!r}; expected TOOL.KEY=V1[,V2...]")
+    return tool_id, key, split_values(values)
+
+
+def build_grid(options: List[str]) -> ParamGrid:
+    """Combine ``tool.key=v1,v2`` options into a parameter grid."""
+    grid: ParamGrid = {}
+    for option in options:
+        tool_id, key, values = parse_param_option(option)
+        grid.setdefault(tool_id, {}).setdefault(key, []).extend(values)
+    return grid
@@ -7,19 +7,52 @@ face swapping operations for the benchmark framework.
 
 from PIL import Image, ImageDraw
 import os
+import time
+import hashlib
 import logging
+import threading
 import requests
 import replicate
 from io import BytesIO
-from typing import Dict, List, Optional, Any, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+from benchmark.utils.faces import detect_face_regions, composite_regions
+
+# Registry metadata (read without importing this module)
+PLUGIN_INFO = {
+    "version": "0.1.0",
+    "capabilities": ["face_swap", "cancel", "params"],
+    # Counts predictions, so a multi-face case takes one slot per face
+    "max_concurrency": 3,
+    "default": True,
+    "inputs": {"max_side": 1024, "avatar_side": 512, "format": "JPEG", "quality": 92},
+    # Estimated USD per prediction, used for run cost budgets
+    "cost_per_call": 0.003,
+    # One prediction per avatar (face) of the case
+    "calls_per_avatar": True,
+}
 
 # Model constants
 FACE_SWAP_MODEL = "cdingram/face-swap"
 FACE_SWAP_VERSION = "d1d6ea8c8be89d664a07a457526f7128109dee7030fdac424788d762c71ed111"
 
+# Parameters handled by the plugin; any other parameter is passed to the model as an input
+LOCAL_PARAMS = ("model_version", "context", "feather")
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Seconds an uploaded file is reused before it is uploaded again
+UPLOAD_TTL = 6 * 3600
+# Maximum number of uploaded files remembered (least recently used are dropped)
+UPLOAD_CACHE_SIZE = 256
+
+# Hosted URLs of uploaded inputs and their expiry times, keyed by content hash
+_upload_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_upload_lock = threading.Lock()
+
 def create_error_image(error_text: str, details: Optional[str] = None) -> Image.Image:
     """
     Create an error image with the specified text.
@@ -45,15 +78,202 @@ def create_error_image(error_text: str, details: Optional[str] = None) -> Image.
     
     return img
 
-def generate(case: Dict[str, Any]) -> Image.Image:
+# Seconds between prediction status checks
+POLL_INTERVAL = 0.5
+
+
+class FaceSwapError(Exception):
+    """Raised when the provider returns no usable output."""
+
+
+class FaceSwapCancelled(Exception):
+    """Raised when a swap is aborted through its cancel event."""
+
+
+def _encode_png(image: Image.Image) -> bytes:
+    """Encode an image as PNG bytes in memory."""
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _upload(data: bytes, name: str) -> Any:
+    """
+    Upload input bytes once and reuse the hosted file for identical inputs.
+    
+    Repeated trials and parameter sweeps send the same template and avatars
+    many times; uploads are cached by content hash for ``UPLOAD_TTL`` seconds,
+    keeping at most ``UPLOAD_CACHE_SIZE`` entries. Clients without the files
+    API fall back to a fresh in-memory file object.
+    """
+    key = hashlib.sha256(data).hexdigest()
+    with _upload_lock:
+        cached = _upload_cache.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            _upload_cache.move_to_end(key)
+            return cached[0]
+        _upload_cache.pop(key, None)
+    if not hasattr(replicate, "files"):
+        buffer = BytesIO(data)
+        buffer.name = name
+        return buffer
+    uploaded = replicate.files.create(BytesIO(data), filename=name)
+    url = uploaded.urls["get"]
+    with _upload_lock:
+        _upload_cache[key] = (url, time.monotonic() + UPLOAD_TTL)
+        while len(_upload_cache) > UPLOAD_CACHE_SIZE:
+            _upload_cache.popitem(last=False)
+    logger.debug(f"Uploaded {name} ({len(data)} bytes) as {url}")
+    return url
+
+
+def _forget_uploads(*inputs: Any) -> None:
+    """Drop cached uploads so the next call uploads them again."""
+    with _upload_lock:
+        for key in [k for k, (url, _) in _upload_cache.items() if url in inputs]:
+            del _upload_cache[key]
+
+
+def _upload_file(path: str) -> Any:
+    """Upload an input file through the upload cache."""
+    with open(path, "rb") as f:
+        return _upload(f.read(), os.path.basename(path))
+
+
+def _swap_face(input_image, swap_image, cancel_event: Optional[threading.Event] = None,
+               version: str = FACE_SWAP_VERSION, extra_input: Optional[Dict[str, Any]] = None) -> Image.Image:
+    """
+    Run one face swap on Replicate and download the result.
+    
+    The prediction is polled rather than awaited with ``replicate.run`` so that
+    setting ``cancel_event`` cancels it on Replicate instead of leaving it running.
+    
+    Args:
+        input_image: Uploaded URL or file object for the image whose face is replaced
+        swap_image: Uploaded URL or file object for the avatar supplying the new face
+        cancel_event: Optional event that aborts the prediction when set
+        version: Model version to run
+        extra_input: Additional model inputs
+        
+    Returns:
+        The swapped image
+    """
+    prediction = replicate.predictions.create(
+        version=version,
+        input={
+            **(extra_input or {}),
+            "input_image": input_image,
+            "swap_image": swap_image
+        }
+    )
+    while prediction.status not in ("succeeded", "failed", "canceled"):
+        if cancel_event is not None and cancel_event.wait(POLL_INTERVAL):
+            prediction.cancel()
+            logger.info(f"Cancelled prediction {prediction.id}")
+            raise FaceSwapCancelled(f"Prediction {prediction.id} cancelled")
+        if cancel_event is None:
+            time.sleep(POLL_INTERVAL)
+        prediction.reload()
+    if prediction.status == "failed":
+        # The hosted inputs may have expired; upload them afresh next time
+        _forget_uploads(input_image, swap_image)
+    if prediction.status != "succeeded":
+        raise FaceSwapError(prediction.error or f"Prediction {prediction.status}")
+    
+    result = prediction.output
+    if isinstance(result, list):
+        result = result[0] if result else None
+    if not result:
+        raise FaceSwapError("No output received from model")
+    logger.debug(f"Output URL: {result}")
+    
+    # Download the result image
+    response = requests.get(result, timeout=30)
+    response.raise_for_status()
+    img = Image.open(BytesIO(response.content))
+    img.load()
+    return img
+
+
+def _swap_multiple(template_path: str, avatar_paths: List[str],
+                   cancel_event: Optional[threading.Event] = None,
+                   params: Optional[Dict[str, Any]] = None) -> Image.Image:
+    """
+    Swap every face in the template, one avatar per face.
+    
+    Face regions are located in the template (ordered left to right, matching
+    the avatar order) and each region is cropped in memory and swapped by a
+    separate request. The requests run concurrently, so a case costs roughly
+    one provider round trip of wall-clock time, and the swapped crops are
+    composited back into a single output. ``params`` may set the crop
+    ``context`` and the composite ``feather`` besides the model parameters.
+    If one region fails, the other predictions are cancelled and the first
+    failure is raised.
+    """
+    params = params or {}
+    template = Image.open(template_path).convert('RGB')
+    regions = detect_face_regions(template, len(avatar_paths), context=float(params.get("context", 1.0)))
+    # Shared by all regions; set by the caller or by the first failing region
+    cancel_event = cancel_event or threading.Event()
+    errors: List[Exception] = []
+    
+    def _swap_region(index: int) -> Image.Image:
+        try:
+            crop = _upload(_encode_png(template.crop(regions[index].crop)), f"face_{index + 1}.png")
+            return _swap_face(crop, _upload_file(avatar_paths[index]), cancel_event, **_model_args(params))
+        except Exception as e:
+            if not isinstance(e, FaceSwapCancelled) or not cancel_event.is_set():
+                errors.append(e)
+            cancel_event.set()
+            raise
+    
+    with ThreadPoolExecutor(max_workers=len(regions)) as pool:
+        futures = [pool.submit(_swap_region, i) for i in range(len(regions))]
+    if errors:
+        raise errors[0]
+    swapped = [f.result() for f in futures]
+    return composite_regions(template, list(zip(regions, swapped)), feather=int(params.get("feather", 8)))
+
+
+def validate_params(params: Dict[str, Any]) -> None:
+    """
+    Check the locally handled sweep parameters before a run is created.
+
+    Raises:
+        ValueError: If ``context`` or ``feather`` is invalid
+    """
+    try:
+        if "context" in params and float(params["context"]) < 0:
+            raise ValueError(f"context must not be negative, got {params['context']}")
+        if "feather" in params and int(params["feather"]) < 0:
+            raise ValueError(f"feather must not be negative, got {params['feather']}")
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid face-swap parameters {params}: {e}")
+
+
+def _model_args(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Split sweep parameters into the model version and extra model inputs."""
+    return {
+        "version": params.get("model_version", FACE_SWAP_VERSION),
+        "extra_input": {k: v for k, v in params.items() if k not in LOCAL_PARAMS},
+    }
+
+
+def generate(case: Dict[str, Any], cancel_event: Optional[threading.Event] = None,
+             params: Optional[Dict[str, Any]] = None) -> Image.Image:
     """
     Generate an image for a test case using Replicate's face-swap model.
     
     This plugin uses Replicate's Python client to perform face swapping operations.
-    It takes the template image and the first avatar from the case and swaps faces.
+    With a single avatar the whole template is sent in one request. With several
+    avatars each face in the template is swapped with its avatar (left to right)
+    by concurrent per-face requests, and the results are composited together.
     
     Args:
         case: A dictionary containing test case details including template_image and avatars
+        cancel_event: Optional event; when set, in-flight predictions are cancelled
+        params: Optional sweep parameters: ``model_version``, ``context`` and
+            ``feather`` (multi-face cases); any other key is sent as a model input
         
     Returns:
         A PIL Image with the face swap result
@@ -67,53 +287,41 @@ def generate(case: Dict[str, Any]) -> Image.Image:
     # Extract case details
     case_id = case.get('id', 'unknown')
     template_path = case.get('template_image')
-    avatar_paths = case.get('avatars', [])
+    avatar_paths = case.get('avatars', []) or []
     
     # Verify required inputs
     if not template_path or not os.path.exists(template_path):
         logger.error(f"Missing template image for case: {case_id}")
         return create_error_image("Error: Missing template image")
     
-    if not avatar_paths or not os.path.exists(avatar_paths[0]):
+    if not avatar_paths or not all(os.path.exists(p) for p in avatar_paths):
         logger.error(f"Missing avatar image for case: {case_id}")
         return create_error_image("Error: Missing avatar image")
     
     # Log what we're doing
     logger.info(f"Processing case: {case_id}")
     logger.info(f"Using template at: {template_path}")
-    logger.info(f"Using avatar at: {avatar_paths[0]}")
+    logger.info(f"Using avatars at: {', '.join(avatar_paths)}")
     
     try:
-        # The Replicate Python client handles file uploads automatically
+        # Inputs are uploaded once per content hash and shared across calls
         logger.info("Starting face swap process...")
         
-        # Prepare input for the model
-        with open(template_path, "rb") as template_file, open(avatar_paths[0], "rb") as avatar_file:
-            input_params = {
-                "input_image": template_file,
-                "swap_image": avatar_file
-            }
-            
-            # Run the model
-            result = replicate.run(
-                f"{FACE_SWAP_MODEL}:{FACE_SWAP_VERSION}", 
-                input=input_params
-            )
-        
-        if not result:
-            logger.error(f"Face swap failed for case: {case_id} - No output received")
-            return create_error_image("Error: Face swap failed", "No output received from model")
+        if len(avatar_paths) == 1:
+            result = _swap_face(_upload_file(template_path), _upload_file(avatar_paths[0]), cancel_event,
+                                **_model_args(params or {}))
+        else:
+            result = _swap_multiple(template_path, avatar_paths, cancel_event, params)
         
         logger.info(f"Face swap completed successfully for case: {case_id}")
-        logger.debug(f"Output URL: {result}")
-        
-        # Download the result image
-        response = requests.get(result, timeout=30)
-        response.raise_for_status()
-        
-        # Return as PIL Image
-        return Image.open(BytesIO(response.content))
+        return result
         
+    except FaceSwapCancelled as e:
+        logger.info(f"Face swap cancelled for case: {case_id}")
+        return create_error_image("Cancelled", str(e))
+    except FaceSwapError as e:
+        logger.error(f"Face swap failed for case: {case_id} - {e}")
+        return create_error_image("Error: Face swap failed", str(e))
     except Exception as e:
         logger.exception(f"Error generating image for case: {case_id}")
-        return create_error_image("Error:", str(e))
\ No newline at end of file
+        return create_error_image("Error:", str(e))
@@ -0,0 +1,118 @@
+"""
+Synthetic load-generating plugin.
+
+This plugin never calls a provider. It sleeps for a configurable latency,
+fails at a configurable rate and returns a noise image of a configurable
+size, which makes it suitable for stress-testing the runner, the database
+and the web tier without network access.
+
+Configuration is read from the environment on every call:
+    SYNTHETIC_LATENCY       latency distribution spec (see ``LatencyModel``)
+    SYNTHETIC_FAILURE_RATE  probability in [0, 1] that a call raises
+    SYNTHETIC_OUTPUT_SIZE   output size as ``WIDTHxHEIGHT``
+    SYNTHETIC_SEED          optional seed for reproducible runs
+
+Per-item ``params`` (``latency``, ``failure_rate``, ``output_size``) override
+the environment, so one sweep run can cover several load profiles.
+"""
+
+import os
+import random
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from PIL import Image
+
+from benchmark.core.transport import LatencyModel
+
+# Registry metadata; not part of default runs
+PLUGIN_INFO = {
+    "version": "0.1.0",
+    "capabilities": ["synthetic", "cancel", "params"],
+    "max_concurrency": None,
+    "default": False,
+}
+
+# Defaults
+DEFAULT_LATENCY = "lognormal:0.05,0.5"
+DEFAULT_OUTPUT_SIZE = "256x256"
+
+# Parameters accepted per item
+PARAMS = ("latency", "failure_rate", "output_size")
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+_rng_lock = threading.Lock()
+_rng = random.Random(os.getenv("SYNTHETIC_SEED"))
+
+
+class SyntheticFailure(Exception):
+    """Raised for calls the plugin decides to fail."""
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    """Parse a ``WIDTHxHEIGHT`` string."""
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height or width)
+
+
+def validate_params(params: Dict[str, Any]) -> None:
+    """
+    Check sweep parameters before a run is created.
+
+    Raises:
+        ValueError: If a parameter is unknown or its value is invalid
+    """
+    unknown = set(params) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown synthetic parameters: {', '.join(sorted(unknown))}")
+    try:
+        if "latency" in params:
+            LatencyModel(str(params["latency"]))
+        if "failure_rate" in params and not 0 <= float(params["failure_rate"]) <= 1:
+            raise ValueError(f"failure_rate must be between 0 and 1, got {params['failure_rate']}")
+        if "output_size" in params and min(_parse_size(str(params["output_size"]))) < 1:
+            raise ValueError(f"Invalid output_size: {params['output_size']}")
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid synthetic parameters {params}: {e}")
+
+
+def generate(case: Dict[str, Any], cancel_event: Optional[threading.Event] = None,
+             params: Optional[Dict[str, Any]] = None) -> Image.Image:
+    """
+    Simulate a provider call for a test case.
+
+    Args:
+        case: A dictionary containing test case details (only ``id`` is used)
+        cancel_event: Optional event that cuts the simulated call short
+        params: Optional ``latency``, ``failure_rate`` and ``output_size`` overrides
+
+    Returns:
+        A noise image of the configured size
+
+    Raises:
+        SyntheticFailure: At the configured failure rate, or when cancelled
+    """
+    params = params or {}
+    latency_spec = str(params.get("latency", os.getenv("SYNTHETIC_LATENCY", DEFAULT_LATENCY)))
+    failure_rate = float(params.get("failure_rate", os.getenv("SYNTHETIC_FAILURE_RATE", "0")))
+    width, height = _parse_size(str(params.get("output_size", os.getenv("SYNTHETIC_OUTPUT_SIZE", DEFAULT_OUTPUT_SIZE))))
+
+    with _rng_lock:
+        delay = LatencyModel(latency_spec, seed=_rng.getrandbits(32)).sample()
+        fail = _rng.random() < failure_rate
+        seed = _rng.getrandbits(32)
+
+    if cancel_event is not None:
+        if cancel_event.wait(delay):
+            raise SyntheticFailure(f"Synthetic call cancelled for case {case.get('id', 'unknown')}")
+    else:
+        time.sleep(delay)
+    if fail:
+        raise SyntheticFailure(f"Synthetic failure for case {case.get('id', 'unknown')}")
+
+    data = random.Random(seed).randbytes(width * height * 3)
+    return Image.frombytes('RGB', (width, height), data)
@@ -0,0 +1,146 @@
+"""
+Input preprocessing for plugins.
+
+Each plugin may declare an input profile (``PLUGIN_INFO["inputs"]``) that
+describes how templates and avatars should be normalized before upload:
+
+    max_side      cap on the longest template side, in pixels
+    avatar_side   side of the square, face-centered avatar crop
+    format        output encoding, ``JPEG`` or ``PNG``
+    quality       JPEG quality
+
+Every input gets its EXIF orientation applied and is flattened to RGB.
+Results are cached on disk under ``CACHE_DIR/inputs`` keyed by the source
+file hash and the profile, so each tool sees identical, deterministic inputs
+and the work is done once per source image.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps
+
+from benchmark.config import CACHE_DIR
+from benchmark.utils.faces import detect_faces
+from benchmark.utils.image_io import file_digest
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+INPUTS_CACHE_DIR = CACHE_DIR / "inputs"
+
+
+def profile_key(profile: Dict[str, Any]) -> str:
+    """Short stable hash of a preprocessing profile."""
+    encoded = json.dumps(profile, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Apply EXIF orientation and flatten transparency onto white."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def _cap_size(image: Image.Image, max_side: Optional[int]) -> Image.Image:
+    """Downscale so the longest side is at most ``max_side``."""
+    if max_side and max(image.size) > max_side:
+        image = image.copy()
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return image
+
+
+def _face_crop(image: Image.Image, margin: float = 0.6) -> Image.Image:
+    """Square crop centered on the largest face, or on the image center."""
+    width, height = image.size
+    faces = detect_faces(image)
+    if faces:
+        left, top, right, bottom = max(faces, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+        cx, cy = (left + right) / 2, (top + bottom) / 2
+        side = max(right - left, bottom - top) * (1 + 2 * margin)
+    else:
+        cx, cy = width / 2, height / 2
+        side = min(width, height)
+    side = min(side, width, height)
+    x0 = min(max(cx - side / 2, 0), width - side)
+    y0 = min(max(cy - side / 2, 0), height - side)
+    return image.crop((int(x0), int(y0), int(x0 + side), int(y0 + side)))
+
+
+def prepare_image(path: str, profile: Dict[str, Any], role: str) -> str:
+    """
+    Return the path of the normalized version of an input image.
+
+    Args:
+        path: Source image path
+        profile: The plugin's input profile
+        role: ``template`` or ``avatar``
+
+    Returns:
+        Path to the cached, normalized image
+    """
+    fmt = str(profile.get('format', 'PNG')).upper()
+    ext = 'jpg' if fmt == 'JPEG' else fmt.lower()
+    out_path = INPUTS_CACHE_DIR / profile_key(profile) / f"{file_digest(path)}_{role}.{ext}"
+    if out_path.exists():
+        return str(out_path)
+
+    with Image.open(path) as source:
+        image = _to_rgb(source)
+    if role == 'avatar':
+        image = _face_crop(image)
+        image = _cap_size(image, profile.get('avatar_side'))
+    else:
+        image = _cap_size(image, profile.get('max_side'))
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    save_args = {'quality': int(profile.get('quality', 92)), 'optimize': True} if fmt == 'JPEG' else {'optimize': True}
+    # Items of the same case are prepared concurrently in worker threads, so each writer
+    # gets its own temporary file and readers only ever see a complete cache entry
+    with tempfile.NamedTemporaryFile(dir=out_path.parent, prefix=f"{out_path.name}.",
+                                     suffix='.tmp', delete=False) as tmp:
+        try:
+            image.save(tmp, format=fmt, **save_args)
+        except Exception:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, out_path)
+    logger.debug(f"Preprocessed {role} {path} -> {out_path} ({os.path.getsize(path)} -> {out_path.stat().st_size} bytes)")
+    return str(out_path)
+
+
+def prepare_case(case: Dict[str, Any], profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return a copy of a test case whose image paths point at normalized inputs.
+
+    Missing images are left untouched so plugins can report them as usual.
+
+    Args:
+        case: The test case dictionary
+        profile: The plugin's input profile, or None to skip preprocessing
+
+    Returns:
+        The test case to hand to the plugin
+    """
+    if not profile:
+        return case
+    prepared = dict(case)
+    template = case.get('template_image')
+    if template and Path(template).exists():
+        prepared['template_image'] = prepare_image(template, profile, 'template')
+    prepared['avatars'] = [
+        prepare_image(p, profile, 'avatar') if p and Path(p).exists() else p
+        for p in case.get('avatars') or []
+    ]
+    return prepared
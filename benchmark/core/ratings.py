@@ -0,0 +1,90 @@
+"""
+Human ratings of run items.
+
+Ratings are written in bulk: one lookup of the rated items and their
+existing scores per chunk of IDs, then a single commit, so rating a whole
+grid costs one write transaction instead of one per click.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+from benchmark.core.models import HumanScore, RunItem
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+MIN_STARS = 1
+MAX_STARS = 5
+# Stay well under SQLite's bound-parameter limit in IN queries
+_CHUNK = 500
+
+
+def parse_ratings(entries: Iterable[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Validate rating entries of the form ``{"run_item_id": N, "stars": S}``.
+
+    Later entries for the same item win, so a burst of clicks keeps the last one.
+
+    Raises:
+        ValueError: If an entry is malformed or its stars are out of range
+    """
+    ratings: Dict[int, int] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Invalid rating entry: {entry!r}")
+        try:
+            run_item_id = int(entry['run_item_id'])
+            stars = int(entry['stars'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid rating entry: {entry!r}")
+        if not MIN_STARS <= stars <= MAX_STARS:
+            raise ValueError(f"Stars must be between {MIN_STARS} and {MAX_STARS}, got {stars}")
+        ratings[run_item_id] = stars
+    return ratings
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for i in range(0, len(ids), _CHUNK):
+        yield ids[i:i + _CHUNK]
+
+
+def save_ratings(session, ratings: Dict[int, int]) -> Tuple[Dict[str, Dict[int, int]], List[int]]:
+    """
+    Insert or update human scores in one transaction.
+
+    Args:
+        session: Database session
+        ratings: Stars per run item ID
+
+    Returns:
+        The saved ratings grouped by run ID, and the IDs of unknown run items
+        (which are skipped)
+    """
+    ids = sorted(ratings)
+    run_of: Dict[int, int] = {}
+    existing: Dict[int, HumanScore] = {}
+    for chunk in _chunks(ids):
+        run_of.update(session.query(RunItem.id, RunItem.run_id).filter(RunItem.id.in_(chunk)).all())
+        for hs in session.query(HumanScore).filter(HumanScore.run_item_id.in_(chunk)).all():
+            existing[hs.run_item_id] = hs
+
+    by_run: Dict[str, Dict[int, int]] = {}
+    unknown = []
+    for run_item_id in ids:
+        if run_item_id not in run_of:
+            unknown.append(run_item_id)
+            continue
+        stars = ratings[run_item_id]
+        if run_item_id in existing:
+            existing[run_item_id].stars = stars
+        else:
+            session.add(HumanScore(run_item_id=run_item_id, stars=stars))
+        by_run.setdefault(str(run_of[run_item_id]), {})[run_item_id] = stars
+    session.commit()
+
+    saved = sum(len(r) for r in by_run.values())
+    logger.info(f"Saved {saved} ratings ({len(existing)} updated) across {len(by_run)} runs")
+    if unknown:
+        logger.warning(f"Skipped ratings for unknown run items: {unknown}")
+    return by_run, unknown
@@ -0,0 +1,221 @@
+"""
+Plugin registry for benchmark tools.
+
+Plugins are discovered from two places: modules in the
+``benchmark.core.plugins`` package and the ``benchmark.plugins`` entry point
+group of installed distributions. Metadata is read from a module-level
+``PLUGIN_INFO`` dictionary literal by parsing the plugin source, so tools can
+be listed without importing heavy plugin modules. A plugin module is imported
+once, the first time it is used.
+
+Example ``PLUGIN_INFO``::
+
+    PLUGIN_INFO = {
+        "version": "1.0.0",
+        "capabilities": ["face_swap"],
+        "max_concurrency": 4,
+        "default": True,
+        "inputs": {"max_side": 1024, "avatar_side": 512, "format": "JPEG", "quality": 92},
+    }
+
+``inputs`` is an optional preprocessing profile (see ``benchmark.core.preprocess``).
+
+Third-party packages register a tool with::
+
+    entry_points={"benchmark.plugins": ["my_tool = my_package.my_tool"]}
+"""
+
+import ast
+import importlib
+import importlib.util
+import logging
+import pkgutil
+import threading
+from dataclasses import dataclass, field, asdict
+from importlib import metadata
+from typing import Any, Dict, List, Optional
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+BUILTIN_PACKAGE = "benchmark.core.plugins"
+ENTRY_POINT_GROUP = "benchmark.plugins"
+
+
+class PluginNotFound(LookupError):
+    """Raised when a tool ID does not match any registered plugin."""
+
+
+@dataclass
+class PluginInfo:
+    """Metadata describing a registered plugin."""
+    id: str
+    version: str = "0.0.0"
+    capabilities: List[str] = field(default_factory=list)
+    max_concurrency: Optional[int] = None
+    default: bool = True
+    input_profile: Optional[Dict[str, Any]] = None
+    cost_per_call: Optional[float] = None
+    calls_per_avatar: bool = False
+    source: str = "builtin"
+    target: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the metadata as a JSON-serializable dictionary."""
+        return asdict(self)
+
+
+def _read_plugin_info(module_name: str) -> Dict[str, Any]:
+    """
+    Read ``PLUGIN_INFO`` from a module's source without importing it.
+
+    Only the module's parent packages are imported to locate the source.
+    Returns an empty dictionary if the module has no literal ``PLUGIN_INFO``.
+    """
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return {}
+    if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+        return {}
+    try:
+        with open(spec.origin, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+    except (OSError, SyntaxError) as e:
+        logger.warning(f"Could not read plugin metadata from {spec.origin}: {e}")
+        return {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == 'PLUGIN_INFO' for t in node.targets
+        ):
+            try:
+                return dict(ast.literal_eval(node.value))
+            except ValueError:
+                logger.warning(f"PLUGIN_INFO in {spec.origin} is not a literal; ignoring")
+                return {}
+    return {}
+
+
+def _make_info(plugin_id: str, raw: Dict[str, Any], source: str, target: str,
+               version: Optional[str] = None) -> PluginInfo:
+    """Build a PluginInfo from raw ``PLUGIN_INFO`` values."""
+    return PluginInfo(
+        id=plugin_id,
+        version=str(raw.get('version') or version or "0.0.0"),
+        capabilities=list(raw.get('capabilities', [])),
+        max_concurrency=raw.get('max_concurrency'),
+        default=bool(raw.get('default', True)),
+        input_profile=raw.get('inputs'),
+        cost_per_call=raw.get('cost_per_call'),
+        calls_per_avatar=bool(raw.get('calls_per_avatar', False)),
+        source=source,
+        target=target,
+    )
+
+
+class PluginRegistry:
+    """
+    Discovers plugins, caches their metadata and imports them on first use.
+    """
+
+    def __init__(self):
+        self._infos: Optional[Dict[str, PluginInfo]] = None
+        self._entry_points: Dict[str, Any] = {}
+        self._modules: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _discover(self) -> Dict[str, PluginInfo]:
+        infos: Dict[str, PluginInfo] = {}
+        package = importlib.import_module(BUILTIN_PACKAGE)
+        for mod in pkgutil.iter_modules(package.__path__):
+            if mod.name.startswith('_') or mod.ispkg:
+                continue
+            target = f"{BUILTIN_PACKAGE}.{mod.name}"
+            infos[mod.name] = _make_info(mod.name, _read_plugin_info(target), "builtin", target)
+
+        for ep in metadata.entry_points(group=ENTRY_POINT_GROUP):
+            if ep.name in infos:
+                logger.warning(f"Plugin '{ep.name}' from entry point {ep.value} shadows an existing plugin; skipping")
+                continue
+            module_name = ep.value.split(':', 1)[0].strip()
+            version = ep.dist.version if getattr(ep, 'dist', None) else None
+            infos[ep.name] = _make_info(ep.name, _read_plugin_info(module_name), "entry_point", ep.value, version)
+            self._entry_points[ep.name] = ep
+        logger.debug(f"Discovered {len(infos)} plugins: {', '.join(sorted(infos))}")
+        return infos
+
+    def _ensure(self) -> Dict[str, PluginInfo]:
+        if self._infos is None:
+            with self._lock:
+                if self._infos is None:
+                    self._infos = self._discover()
+        return self._infos
+
+    def list_infos(self) -> List[PluginInfo]:
+        """Return metadata for all registered plugins, sorted by ID."""
+        return [info for _, info in sorted(self._ensure().items())]
+
+    def get_info(self, plugin_id: str) -> PluginInfo:
+        """
+        Return metadata for a plugin.
+
+        Raises:
+            PluginNotFound: If no plugin is registered under this ID
+        """
+        try:
+            return self._ensure()[plugin_id]
+        except KeyError:
+            raise PluginNotFound(f"Unknown tool: {plugin_id}") from None
+
+    def load(self, plugin_id: str) -> Any:
+        """
+        Import a plugin (once) and return the object exposing ``generate``.
+
+        Raises:
+            PluginNotFound: If no plugin is registered under this ID
+        """
+        module = self._modules.get(plugin_id)
+        if module is not None:
+            return module
+        info = self.get_info(plugin_id)
+        with self._lock:
+            if plugin_id not in self._modules:
+                if plugin_id in self._entry_points:
+                    module = self._entry_points[plugin_id].load()
+                else:
+                    module = importlib.import_module(info.target)
+                if not hasattr(module, 'generate'):
+                    raise PluginNotFound(f"Plugin {plugin_id} ({info.target}) has no generate() function")
+                self._modules[plugin_id] = module
+                logger.info(f"Loaded plugin {plugin_id} from {info.target}")
+        return self._modules[plugin_id]
+
+    def refresh(self) -> None:
+        """Forget cached metadata so plugins are rediscovered on next access."""
+        with self._lock:
+            self._infos = None
+            self._entry_points = {}
+
+
+# Process-wide registry
+registry = PluginRegistry()
+
+
+def list_plugins() -> List[PluginInfo]:
+    """Return metadata for all registered plugins."""
+    return registry.list_infos()
+
+
+def get_plugin_info(plugin_id: str) -> PluginInfo:
+    """Return metadata for a single plugin."""
+    return registry.get_info(plugin_id)
+
+
+def load_plugin(plugin_id: str) -> Any:
+    """Import a plugin on first use and return it."""
+    return registry.load(plugin_id)
+
+
+def default_plugin_ids() -> List[str]:
+    """IDs of plugins included in runs that do not name their tools."""
+    return [info.id for info in registry.list_infos() if info.default]
@@ -1,5 +1,6 @@
 import json
 import asyncio
+import time
 import os
 from pathlib import Path
 
@@ -7,6 +8,12 @@ from benchmark.config import DATASETS_DIR, TEST_CASES_FILE, RUNS_DIR
 from benchmark.core.db import init_db, SessionLocal
 from benchmark.core.models import Run, RunItem
 from benchmark.core.evaluator import evaluate
+from benchmark.core.transport import LiveTransport
+from benchmark.core.registry import default_plugin_ids, get_plugin_info, load_plugin
+from benchmark.core.preprocess import prepare_case
+from benchmark.core.hash_index import hash_output, index_inputs, record_output
+from benchmark.core.array_store import ArrayStore
+from benchmark.core.params import expand_grid, load_params, params_key, params_slug
 from benchmark.utils.image_io import save_image
 
 def generate_cases():
@@ -150,13 +157,26 @@ def generate_cases():
 
 MAX_CONCURRENT_TASKS = 3
 
-def start_run(case_ids=None, tool_ids=None):
-    """Initialize a benchmark run record and items; return run_id."""
-    # Initialize DB and load session
+def start_run(case_ids=None, tool_ids=None, cases=None, repeats=1, array_size=None, param_grid=None):
+    """Initialize a benchmark run record and items; return run_id.
+
+    ``cases`` may supply test case dicts directly instead of reading the
+    dataset file (used by the synthetic load benchmark). With ``repeats``
+    above 1 every case/tool pair gets that many trials; items are ordered
+    trial by trial with the tool order rotated, so each tool's trials are
+    spread across the run instead of bunched together. With ``array_size``
+    the run gets a packed array store of its outputs at that resolution.
+
+    ``param_grid`` maps tool IDs to ``{param: [values]}``; each tool's grid is
+    expanded to the cartesian product of its values and every case gets one
+    item per grid point. Tools in the grid must have the ``params`` capability.
+    """
+    # Initialize DB
     init_db()
-    session = SessionLocal()
     # Load test cases
-    if TEST_CASES_FILE.exists():
+    if cases is not None:
+        test_cases = list(cases)
+    elif TEST_CASES_FILE.exists():
         with open(TEST_CASES_FILE, 'r') as f:
             test_cases = json.load(f)
     else:
@@ -165,8 +185,21 @@ def start_run(case_ids=None, tool_ids=None):
     if case_ids:
         test_cases = [tc for tc in test_cases if tc.get('id') in case_ids]
     # Determine tools
-    available_tools = ["baseline_replicate"]
-    tools = list(tool_ids) if tool_ids else available_tools
+    tools = list(tool_ids) if tool_ids else default_plugin_ids()
+    # Expand parameter grids before creating anything
+    param_grid = param_grid or {}
+    for tool in param_grid:
+        if tool not in tools:
+            raise ValueError(f"Parameter grid given for {tool}, which is not part of the run")
+        if 'params' not in get_plugin_info(tool).capabilities:
+            raise ValueError(f"Plugin {tool} does not accept parameters")
+    grid_points = {tool: expand_grid(param_grid.get(tool)) for tool in tools}
+    for tool in param_grid:
+        validate = getattr(load_plugin(tool), 'validate_params', None)
+        if validate is not None:
+            for params in grid_points[tool]:
+                validate(params)
+    session = SessionLocal()
     # Create run record
     run = Run()
     session.add(run)
@@ -175,123 +208,166 @@ def start_run(case_ids=None, tool_ids=None):
     # Create run directory
     run_dir = RUNS_DIR / str(run_id)
     run_dir.mkdir(parents=True, exist_ok=True)
-    # Create run items for each case-tool pair
-    for tc in test_cases:
-        case_id = tc.get('id')
-        for tool in tools:
-            item = RunItem(
-                run_id=run.id,
-                case_id=case_id,
-                tool_id=tool,
-                status='queued',
-                image_url='',
-                score=None
-            )
-            session.add(item)
+    # Create run items for each case-tool pair and trial
+    items = []
+    for trial in range(max(int(repeats), 1)):
+        for idx, tc in enumerate(test_cases):
+            case_id = tc.get('id')
+            shift = (trial + idx) % len(tools) if tools else 0
+            for tool in tools[shift:] + tools[:shift]:
+                for params in grid_points[tool]:
+                    item = RunItem(
+                        run_id=run.id,
+                        case_id=case_id,
+                        tool_id=tool,
+                        status='queued',
+                        image_url='',
+                        score=None,
+                        trial=trial,
+                        params=params_key(params)
+                    )
+                    session.add(item)
+                    items.append(item)
     session.commit()
+    # Index the run's templates and avatars alongside the outputs it will produce
+    index_inputs(session, test_cases)
+    if array_size and items:
+        ArrayStore.create(run_id, [item.id for item in items], int(array_size))
     session.close()
     return str(run_id)
 
-async def execute_run_async(run_id: str, manager=None):
-    """Execute an existing run: generate and evaluate images asynchronously."""
+class RunContext:
+    """State shared by the items of a run while it executes."""
+
+    def __init__(self, run_id: str, session, items, cases_by_id, manager=None, transport=None):
+        self.run_id = run_id
+        self.session = session
+        self.items = items
+        self.cases_by_id = cases_by_id
+        self.manager = manager
+        self.transport = transport or LiveTransport()
+        self.array_store = ArrayStore.open(run_id, writable=True)
+
+    async def broadcast_item(self, item: RunItem, image_url=None, score=None, flag=None):
+        """Send a progress update for an item, if anyone is listening."""
+        if self.manager:
+            await self.manager.broadcast({
+                'type': 'update',
+                'run_id': self.run_id,
+                'run_item_id': item.id,
+                'case_id': item.case_id,
+                'tool_id': item.tool_id,
+                'status': item.status,
+                'image_url': image_url,
+                'score': score,
+                'flag': flag
+            })
+
+def load_run_context(run_id: str, manager=None, transport=None) -> RunContext:
+    """Open a session and load a run's items and test case metadata."""
     init_db()
-    print(f"[Runner] execute_run_async started for run {{run_id}}")
     session = SessionLocal()
     # Load run items
-    items = session.query(RunItem).filter_by(run_id=int(run_id)).all()
-    print(f"[Runner] Loaded {{len(items)}} run items for run {{run_id}}")
+    items = session.query(RunItem).filter_by(run_id=int(run_id)).order_by(RunItem.id).all()
+    print(f"[Runner] Loaded {len(items)} run items for run {run_id}")
     # Load test cases for metadata
     if TEST_CASES_FILE.exists():
         with open(TEST_CASES_FILE, 'r') as f:
             test_cases = json.load(f)
     else:
         test_cases = []
-    # Semaphore for concurrency
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+    cases_by_id = {c.get('id'): c for c in test_cases}
+    return RunContext(run_id, session, items, cases_by_id, manager, transport)
 
-    async def _process(item: RunItem):
-        async with semaphore:
-            # Update status to generating
-            item.status = 'generating'
-            session.commit()
-            if manager:
-                await manager.broadcast({
-                    'type': 'update',
-                    'run_id': run_id,
-                    'run_item_id': item.id,
-                    'case_id': item.case_id,
-                    'tool_id': item.tool_id,
-                    'status': item.status,
-                    'image_url': None,
-                    'score': None
-                })
-            # Attempt to generate image via plugin
-            try:
-                module = __import__(f'benchmark.core.plugins.{item.tool_id}', fromlist=['generate'])
-                # Load full test-case metadata
-                with open(TEST_CASES_FILE, 'r') as f:
-                    all_cases = json.load(f)
-                case_dict = next((c for c in all_cases if c.get('id') == item.case_id), {'id': item.case_id})
-                img = module.generate(case_dict)
-                if img is None:
-                    raise Exception(f"Plugin {item.tool_id} returned None instead of an image")
-            except Exception as e:
-                from PIL import Image, ImageDraw
-                import traceback
-                print(f"[Runner] Error in plugin {item.tool_id} for case {item.case_id}: {str(e)}")
-                traceback.print_exc()
-                img = Image.new('RGB', (512, 512), color=(200, 200, 200))
-                # Add error text to the image
-                draw = ImageDraw.Draw(img)
-                draw.text((10, 10), f"Error in {item.tool_id}:", fill=(255, 0, 0))
-                draw.text((10, 30), f"{str(e)[:100]}...", fill=(0, 0, 0))
-            # Save image to disk
-            run_dir = Path(RUNS_DIR) / run_id
-            tool_dir = run_dir / item.tool_id
-            tool_dir.mkdir(parents=True, exist_ok=True)
-            img_path = tool_dir / f"{item.case_id}.png"
-            save_image(img, str(img_path))
-            item.image_url = f"/runs/{run_id}/{item.tool_id}/{item.case_id}.png"
-            # Update status to evaluating
-            item.status = 'evaluating'
-            session.commit()
-            if manager:
-                await manager.broadcast({
-                    'type': 'update',
-                    'run_id': run_id,
-                    'run_item_id': item.id,
-                    'case_id': item.case_id,
-                    'tool_id': item.tool_id,
-                    'status': item.status,
-                    'image_url': item.image_url,
-                    'score': None
-                })
-            # Evaluate image
-            score = evaluate(str(img_path))
-            item.score = str(score)
-            item.status = 'scored'
-            session.commit()
-            if manager:
-                await manager.broadcast({
-                    'type': 'update',
-                    'run_id': run_id,
-                    'run_item_id': item.id,
-                    'case_id': item.case_id,
-                    'tool_id': item.tool_id,
-                    'status': item.status,
-                    'image_url': item.image_url,
-                    'score': score
-                })
+async def process_item(ctx: RunContext, item: RunItem, cancel_event=None):
+    """Generate, save and evaluate the image for one run item.
 
-    # Launch tasks for all items
-    tasks = [asyncio.create_task(_process(item)) for item in items]
-    print(f"[Runner] Launched {{len(tasks)}} tasks for run {{run_id}}")
-    await asyncio.gather(*tasks)
-    print(f"[Runner] All tasks completed for run {{run_id}}")
-    session.close()
+    ``cancel_event`` (a ``threading.Event``) is handed to plugins that
+    declare the ``cancel`` capability so they can abort provider calls.
+    Returns False if generation failed or the output is the error placeholder.
+    """
+    session = ctx.session
+    # Full test-case metadata
+    source_case = ctx.cases_by_id.get(item.case_id, {'id': item.case_id})
+    # Update status to generating
+    item.status = 'generating'
+    session.commit()
+    await ctx.broadcast_item(item)
+    # Attempt to generate image via plugin
+    failed = False
+    try:
+        module = load_plugin(item.tool_id)
+        info = get_plugin_info(item.tool_id)
+        # Normalize inputs per the tool's profile (cached on disk)
+        case_dict = await asyncio.to_thread(prepare_case, source_case, info.input_profile)
+        kwargs = {'cancel_event': cancel_event} if cancel_event is not None and 'cancel' in info.capabilities else {}
+        params = load_params(item.params)
+        if params and 'params' in info.capabilities:
+            kwargs['params'] = params
+        started = time.perf_counter()
+        img = await ctx.transport.generate(item.tool_id, module, case_dict, trial=item.trial or 0, **kwargs)
+        if img is None:
+            raise Exception(f"Plugin {item.tool_id} returned None instead of an image")
+        item.latency = time.perf_counter() - started
+    except Exception as e:
+        from PIL import Image, ImageDraw
+        import traceback
+        failed = True
+        print(f"[Runner] Error in plugin {item.tool_id} for case {item.case_id}: {str(e)}")
+        traceback.print_exc()
+        img = Image.new('RGB', (512, 512), color=(200, 200, 200))
+        # Add error text to the image
+        draw = ImageDraw.Draw(img)
+        draw.text((10, 10), f"Error in {item.tool_id}:", fill=(255, 0, 0))
+        draw.text((10, 30), f"{str(e)[:100]}...", fill=(0, 0, 0))
+    # Save image to disk
+    run_dir = Path(RUNS_DIR) / ctx.run_id
+    tool_dir = run_dir / item.tool_id
+    tool_dir.mkdir(parents=True, exist_ok=True)
+    stem = '__'.join(filter(None, [item.case_id, params_slug(load_params(item.params)),
+                                   f"t{item.trial}" if item.trial else '']))
+    file_name = f"{stem}.png"
+    img_path = tool_dir / file_name
+    save_image(img, str(img_path))
+    item.image_url = f"/runs/{ctx.run_id}/{item.tool_id}/{file_name}"
+    # Perceptual hash: flag unchanged templates and error placeholders
+    template_path = source_case.get('template_image')
+    output_hash, template_hash, canvas = await asyncio.to_thread(hash_output, img, template_path)
+    flag = record_output(session, item, str(img_path), output_hash, template_path, template_hash, canvas)
+    # Update status to evaluating
+    item.status = 'evaluating'
+    session.commit()
+    await ctx.broadcast_item(item, image_url=item.image_url, flag=flag)
+    # Evaluate image
+    score = evaluate(str(img_path))
+    if ctx.array_store is not None:
+        await asyncio.to_thread(ctx.array_store.put, item.id, img)
+    item.score = str(score)
+    item.status = 'scored'
+    session.commit()
+    await ctx.broadcast_item(item, image_url=item.image_url, score=score, flag=flag)
+    return not failed and flag != 'error_placeholder'
+
+async def execute_run_async(run_id: str, manager=None, transport=None, max_concurrency=None, budget=None):
+    """Execute an existing run: generate and evaluate images asynchronously.
+
+    ``transport`` controls how plugins are called (live, record or replay);
+    it defaults to calling plugins live. ``max_concurrency`` overrides
+    ``MAX_CONCURRENT_TASKS`` for this run and ``budget`` (a ``Budget``) caps
+    its time, calls, cost and error rate. The run is driven by a private
+    scheduler; the web app shares one scheduler across all runs instead.
+    """
+    from benchmark.core.scheduler import Scheduler
+
+    print(f"[Runner] execute_run_async started for run {run_id}")
+    scheduler = Scheduler(max_concurrency or MAX_CONCURRENT_TASKS)
+    handle = await scheduler.submit(run_id, manager, transport, budget=budget)
+    await handle.wait()
+    print(f"[Runner] All tasks completed for run {run_id}")
 
-def run_benchmark(case_ids=None, tool_ids=None):
+def run_benchmark(case_ids=None, tool_ids=None, transport=None, repeats=1, budget=None, array_size=None,
+                  param_grid=None):
     """Synchronous wrapper: start run and execute tasks to completion."""
-    run_id = start_run(case_ids, tool_ids)
-    asyncio.run(execute_run_async(run_id))
+    run_id = start_run(case_ids, tool_ids, repeats=repeats, array_size=array_size, param_grid=param_grid)
+    asyncio.run(execute_run_async(run_id, transport=transport, budget=budget))
     return run_id
\ No newline at end of file
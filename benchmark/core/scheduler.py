@@ -0,0 +1,459 @@
+"""
+Central scheduler for benchmark runs.
+
+The scheduler owns every active run in the process. Items are dispatched
+under a global concurrency limit and each tool's ``max_concurrency``, shared
+across runs, and runs get a fair share of the free slots in proportion to
+their priority (stride scheduling). Runs can be paused, resumed, cancelled
+and re-prioritized while they execute. Cancelling a run aborts its in-flight
+items: their tasks are cancelled and plugins that support it are told to
+cancel the provider call. A run may carry a ``Budget``; once it trips, the
+run stops dispatching and its remaining items are marked ``skipped``.
+
+With several web workers each run is owned by the scheduler of the worker
+that started it. Control actions for runs owned elsewhere are sent over the
+event bus as ``control_request`` messages; the owning scheduler applies them
+and answers with a ``control_reply``.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from benchmark.core.budget import Budget
+from benchmark.core.models import RunItem
+from benchmark.core.registry import get_plugin_info
+from benchmark.core.runner import MAX_CONCURRENT_TASKS, RunContext, load_run_context, process_item
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+RUN_STATES = ('running', 'paused', 'cancelled', 'stopped', 'completed')
+CONTROL_ACTIONS = ('pause', 'resume', 'cancel', 'priority')
+# Bus messages between schedulers; never relayed to WebSocket clients
+CONTROL_MESSAGES = ('control_request', 'control_reply')
+# Seconds to wait for the owner of a run to answer a control request
+CONTROL_TIMEOUT = 2.0
+
+
+class Slot(NamedTuple):
+    """What a dispatched item holds: its ID, its tool and its provider calls."""
+    item_id: int
+    tool_id: str
+    calls: int
+
+
+class RunHandle:
+    """Scheduling state of one active run."""
+
+    def __init__(self, ctx: RunContext, items: List[RunItem], priority: int, order: int,
+                 budget: Optional[Budget] = None):
+        self.ctx = ctx
+        self.run_id = ctx.run_id
+        self.priority = max(int(priority), 1)
+        self.order = order
+        self.state = 'running'
+        self.total = len(items)
+        self.finished = 0
+        self.pass_value = 0.0
+        self.budget = budget
+        self.deadline: Optional[asyncio.TimerHandle] = None
+        # Pending items per tool, each tagged with its position in the run
+        self.pending: Dict[str, Deque[Tuple[int, RunItem]]] = {}
+        for seq, item in enumerate(items):
+            self.pending.setdefault(item.tool_id, deque()).append((seq, item))
+        self.inflight: Dict[int, Tuple[asyncio.Task, threading.Event]] = {}
+        self.done = asyncio.Event()
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(q) for q in self.pending.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable summary of the run's progress."""
+        return {
+            'run_id': self.run_id,
+            'state': self.state,
+            'priority': self.priority,
+            'total': self.total,
+            'pending': self.pending_count,
+            'in_flight': len(self.inflight),
+            'finished': self.finished,
+            'budget': self.budget.snapshot() if self.budget else None,
+        }
+
+    async def wait(self) -> None:
+        """Wait until the run completes or is cancelled."""
+        await self.done.wait()
+
+
+class Scheduler:
+    """
+    Dispatches run items from all active runs.
+
+    Args:
+        max_concurrency: Maximum number of items processed at once, across runs
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_TASKS):
+        self.max_concurrency = max_concurrency
+        self.runs: Dict[str, RunHandle] = {}
+        self.inflight = 0
+        self.tool_inflight: Dict[str, int] = {}
+        self._order = itertools.count()
+        self.bus = None
+        self._replies: Dict[str, asyncio.Future] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(self, run_id: str, manager=None, transport=None, priority: int = 1,
+                     budget: Optional[Budget] = None) -> RunHandle:
+        """
+        Start scheduling a run's queued items.
+
+        Args:
+            run_id: The run to execute
+            manager: Object with an async ``broadcast(message)`` for progress events
+            transport: Transport used for plugin calls
+            priority: Relative share of dispatch slots (higher gets more)
+            budget: Optional limits on wall time, calls, cost and error rate
+
+        Returns:
+            The run's handle; await ``handle.wait()`` for completion
+        """
+        run_id = str(run_id)
+        if run_id in self.runs:
+            return self.runs[run_id]
+        ctx = load_run_context(run_id, manager, transport)
+        items = [item for item in ctx.items if item.status == 'queued']
+        handle = RunHandle(ctx, items, priority, next(self._order), budget)
+        # New runs join at the current virtual time so they cannot monopolize slots
+        active = [h.pass_value for h in self.runs.values() if h.state == 'running']
+        handle.pass_value = min(active) if active else 0.0
+        self.runs[run_id] = handle
+        if budget:
+            budget.start()
+            if budget.max_seconds is not None:
+                # Trip the wall-time budget even if no item finishes in the meantime
+                handle.deadline = asyncio.get_running_loop().call_later(budget.max_seconds, self._check_deadline, handle)
+        logger.info(f"Scheduled run {run_id}: {handle.total} items, priority {handle.priority}")
+        await self._broadcast_state(handle)
+        if not items:
+            await self._finish(handle)
+        else:
+            self._dispatch()
+        return handle
+
+    def listen(self, bus) -> None:
+        """Exchange control requests for runs with the schedulers of other workers over ``bus``."""
+        self.bus = bus
+        bus.subscribe(self._on_bus_message)
+
+    async def control(self, run_id: str, action: str, priority: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply a control action to a run, wherever it is executing.
+
+        Runs owned by this scheduler are controlled directly. Otherwise the
+        request is published on the shared bus (see ``listen``) and the
+        owning scheduler's reply is returned.
+
+        Args:
+            run_id: The run to control
+            action: One of ``CONTROL_ACTIONS``
+            priority: The new priority for the ``priority`` action
+
+        Returns:
+            A dictionary with ``status`` (``success`` or ``error``), the run's
+            ``state`` and a ``message`` on errors
+        """
+        run_id = str(run_id)
+        if action not in CONTROL_ACTIONS or (action == 'priority' and priority is None):
+            return {'status': 'error', 'message': f'Unknown action: {action}'}
+        if self.get(run_id) is not None or self.bus is None or not self.bus.shared:
+            return await self._apply_control(run_id, action, priority)
+        request_id = uuid.uuid4().hex
+        reply = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = reply
+        try:
+            await self.bus.publish({'type': 'control_request', 'request_id': request_id,
+                                    'run_id': run_id, 'action': action, 'priority': priority})
+            return await asyncio.wait_for(reply, CONTROL_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {'status': 'error', 'message': f'Run {run_id} is not active', 'state': None}
+        finally:
+            self._replies.pop(request_id, None)
+
+    async def _apply_control(self, run_id: str, action: str, priority: Optional[int]) -> Dict[str, Any]:
+        if action == 'pause':
+            ok = await self.pause(run_id)
+        elif action == 'resume':
+            ok = await self.resume(run_id)
+        elif action == 'cancel':
+            ok = await self.cancel(run_id)
+        else:
+            ok = await self.set_priority(run_id, priority)
+        handle = self.get(run_id)
+        state = handle.state if handle else None
+        if not ok:
+            return {'status': 'error', 'message': f'Cannot {action} run {run_id}', 'state': state}
+        logger.info(f"Run {run_id}: {action} applied")
+        return {'status': 'success', 'state': state}
+
+    async def _on_bus_message(self, message: Dict[str, Any]) -> None:
+        if message.get('type') == 'control_request':
+            # Only the owner answers; the requester times out if nobody owns the run
+            run_id = str(message.get('run_id'))
+            if self.get(run_id) is None:
+                return
+            result = await self._apply_control(run_id, message.get('action'), message.get('priority'))
+            await self.bus.publish({'type': 'control_reply', 'request_id': message.get('request_id'),
+                                    'result': result})
+        elif message.get('type') == 'control_reply':
+            reply = self._replies.get(message.get('request_id'))
+            if reply is not None and not reply.done():
+                reply.set_result(message.get('result'))
+
+    def get(self, run_id: str) -> Optional[RunHandle]:
+        """Return the handle of an active run, if any."""
+        return self.runs.get(str(run_id))
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Summaries of all active runs."""
+        return [h.snapshot() for h in sorted(self.runs.values(), key=lambda h: h.order)]
+
+    async def pause(self, run_id: str) -> bool:
+        """Stop dispatching new items for a run; in-flight items finish."""
+        handle = self.get(run_id)
+        if not handle or handle.state != 'running':
+            return False
+        handle.state = 'paused'
+        await self._broadcast_state(handle)
+        return True
+
+    async def resume(self, run_id: str) -> bool:
+        """Resume dispatching items for a paused run."""
+        handle = self.get(run_id)
+        if not handle or handle.state != 'paused':
+            return False
+        handle.state = 'running'
+        active = [h.pass_value for h in self.runs.values() if h.state == 'running' and h is not handle]
+        handle.pass_value = max(handle.pass_value, min(active)) if active else handle.pass_value
+        await self._broadcast_state(handle)
+        self._dispatch()
+        return True
+
+    async def set_priority(self, run_id: str, priority: int) -> bool:
+        """Change a run's share of dispatch slots."""
+        handle = self.get(run_id)
+        if not handle:
+            return False
+        handle.priority = max(int(priority), 1)
+        await self._broadcast_state(handle)
+        self._dispatch()
+        return True
+
+    async def cancel(self, run_id: str) -> bool:
+        """
+        Cancel a run: mark queued items ``cancelled`` and abort in-flight ones.
+        """
+        handle = self.get(run_id)
+        if not handle or handle.state in ('cancelled', 'completed'):
+            return False
+        handle.state = 'cancelled'
+        skipped = [item for queue in handle.pending.values() for _, item in queue]
+        handle.pending.clear()
+        for item in skipped:
+            item.status = 'cancelled'
+        handle.ctx.session.commit()
+        for item in skipped:
+            await handle.ctx.broadcast_item(item)
+        for task, cancel_event in list(handle.inflight.values()):
+            cancel_event.set()
+            task.cancel()
+        logger.info(f"Cancelled run {run_id}: {len(skipped)} queued, {len(handle.inflight)} in flight")
+        await self._broadcast_state(handle)
+        if not handle.inflight:
+            await self._finish(handle)
+        return True
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _tool_has_capacity(self, tool_id: str, calls: int = 1) -> bool:
+        try:
+            limit = get_plugin_info(tool_id).max_concurrency
+        except LookupError:
+            limit = None
+        used = self.tool_inflight.get(tool_id, 0)
+        # The limit counts provider calls; an item needing more calls than the limit runs alone
+        return not limit or used == 0 or used + calls <= limit
+
+    def _item_calls(self, handle: RunHandle, item: RunItem) -> Tuple[int, Optional[float]]:
+        """Estimated provider calls of an item and the tool's cost per call."""
+        try:
+            info = get_plugin_info(item.tool_id)
+        except LookupError:
+            return 1, None
+        calls = 1
+        if info.calls_per_avatar:
+            case = handle.ctx.cases_by_id.get(item.case_id) or {}
+            calls = max(len(case.get('avatars') or []), 1)
+        return calls, info.cost_per_call
+
+    def _next_item(self, handle: RunHandle) -> Optional[Tuple[RunItem, int, Optional[float]]]:
+        """
+        The earliest pending item of a run whose tool has room for its calls.
+
+        Returns:
+            The item, its estimated provider calls and the tool's cost per call
+        """
+        best = None
+        for tool_id, queue in handle.pending.items():
+            if not queue or (best is not None and queue[0][0] >= best[0]):
+                continue
+            calls, cost_per_call = self._item_calls(handle, queue[0][1])
+            if self._tool_has_capacity(tool_id, calls):
+                best = (queue[0][0], tool_id, calls, cost_per_call)
+        if best is None:
+            return None
+        return handle.pending[best[1]].popleft()[1], best[2], best[3]
+
+    def _dispatch(self) -> None:
+        """Fill free slots, picking the runnable run with the lowest pass value."""
+        while self.inflight < self.max_concurrency:
+            candidates = sorted(
+                (h for h in self.runs.values() if h.state == 'running' and h.pending_count),
+                key=lambda h: (h.pass_value, h.order)
+            )
+            picked = handle = None
+            for handle in candidates:
+                picked = self._next_item(handle)
+                if picked is not None:
+                    break
+            if picked is None:
+                return
+            item, calls, cost_per_call = picked
+            if handle.budget:
+                cost = calls * handle.budget.call_cost(item.tool_id, cost_per_call)
+                reason = handle.budget.check(cost, calls)
+                if reason:
+                    handle.pending[item.tool_id].appendleft((-1, item))
+                    self._stop(handle, reason)
+                    continue
+                handle.budget.record_call(cost, calls)
+            handle.pass_value += 1.0 / handle.priority
+            self._launch(handle, item, calls)
+
+    def _check_deadline(self, handle: RunHandle) -> None:
+        if handle.state in ('running', 'paused') and handle.pending_count:
+            reason = handle.budget.check()
+            if reason:
+                self._stop(handle, reason)
+
+    def _stop(self, handle: RunHandle, reason: str) -> None:
+        """Stop dispatching a run whose budget tripped; its pending items are skipped."""
+        handle.state = 'stopped'
+        logger.warning(f"Run {handle.run_id} stopped: budget exceeded ({reason})")
+        asyncio.create_task(self._skip_pending(handle))
+
+    async def _skip_pending(self, handle: RunHandle) -> None:
+        skipped = [item for queue in handle.pending.values() for _, item in queue]
+        handle.pending.clear()
+        for item in skipped:
+            item.status = 'skipped'
+        handle.ctx.session.commit()
+        for item in skipped:
+            await handle.ctx.broadcast_item(item)
+        await self._broadcast_state(handle)
+        if not handle.inflight:
+            await self._finish(handle)
+
+    def _launch(self, handle: RunHandle, item: RunItem, calls: int) -> None:
+        # Plain copies: the item's ORM attributes expire on commit and its
+        # session is closed once the run finishes
+        slot = Slot(item.id, item.tool_id, calls)
+        cancel_event = threading.Event()
+        task = asyncio.create_task(self._run_item(handle, item, slot, cancel_event))
+        handle.inflight[slot.item_id] = (task, cancel_event)
+        self.inflight += 1
+        self.tool_inflight[slot.tool_id] = self.tool_inflight.get(slot.tool_id, 0) + calls
+        task.add_done_callback(lambda t: self._on_task_done(handle, item, slot, t))
+
+    def _release(self, handle: RunHandle, slot: Slot) -> None:
+        """Free an item's dispatch slots."""
+        handle.inflight.pop(slot.item_id, None)
+        handle.finished += 1
+        self.inflight -= 1
+        self.tool_inflight[slot.tool_id] -= slot.calls
+
+    def _on_task_done(self, handle: RunHandle, item: RunItem, slot: Slot, task: asyncio.Task) -> None:
+        # A task cancelled before its first step never runs its body, so its
+        # slots are still held here. Settle it in a new task; the item's slot
+        # keeps the run (and its session) open until then.
+        entry = handle.inflight.get(slot.item_id)
+        if entry is None or entry[0] is not task:
+            return
+        asyncio.create_task(self._abandon(handle, item, slot))
+
+    async def _abandon(self, handle: RunHandle, item: RunItem, slot: Slot) -> None:
+        """Record an item whose task was cancelled before it started."""
+        item.status = 'cancelled'
+        handle.ctx.session.commit()
+        await handle.ctx.broadcast_item(item)
+        self._release(handle, slot)
+        await self._settle(handle, ok=False, cancelled=True)
+
+    async def _run_item(self, handle: RunHandle, item: RunItem, slot: Slot,
+                        cancel_event: threading.Event) -> None:
+        ok = cancelled = False
+        try:
+            ok = await process_item(handle.ctx, item, cancel_event=cancel_event)
+        except asyncio.CancelledError:
+            cancelled = True
+            item.status = 'cancelled'
+            handle.ctx.session.commit()
+            await handle.ctx.broadcast_item(item)
+            raise
+        except Exception:
+            logger.exception(f"Unexpected error processing item {slot.item_id} of run {handle.run_id}")
+            item.status = 'error'
+            handle.ctx.session.commit()
+            await handle.ctx.broadcast_item(item)
+        finally:
+            self._release(handle, slot)
+            await self._settle(handle, ok, cancelled)
+
+    async def _settle(self, handle: RunHandle, ok: bool, cancelled: bool) -> None:
+        """Account for a finished item, finish its run when nothing is left and refill slots."""
+        if handle.budget and not cancelled:
+            handle.budget.record_result(error=not ok)
+            await self._broadcast_state(handle)
+        if not handle.inflight and (handle.state == 'cancelled' or not handle.pending_count):
+            await self._finish(handle)
+        self._dispatch()
+
+    async def _finish(self, handle: RunHandle) -> None:
+        if handle.done.is_set():
+            return
+        if handle.state not in ('cancelled', 'stopped'):
+            handle.state = 'completed'
+        if handle.deadline:
+            handle.deadline.cancel()
+        self.runs.pop(handle.run_id, None)
+        handle.ctx.session.close()
+        if handle.ctx.array_store is not None:
+            handle.ctx.array_store.flush()
+        handle.done.set()
+        logger.info(f"Run {handle.run_id} {handle.state}")
+        await self._broadcast_state(handle)
+
+    async def _broadcast_state(self, handle: RunHandle) -> None:
+        if handle.ctx.manager:
+            await handle.ctx.manager.broadcast({'type': 'run_state', **handle.snapshot()})
@@ -0,0 +1,132 @@
+"""
+Distribution statistics for repeated trials.
+
+Runs started with ``repeats > 1`` hold several trials of each
+``(case, tool)`` pair. This module summarizes latency, machine scores and
+human ratings per pair and per tool: percentiles, mean, variance and a 95%
+confidence interval for the mean (Student's t). In parameter-sweep runs each
+grid point of a tool is summarized separately.
+"""
+
+import math
+import statistics
+from typing import Any, Dict, Iterable, List, Optional
+
+from benchmark.core.models import HumanScore, ImageHash, RunItem
+from benchmark.core.params import load_params
+
+# Two-sided 95% critical values of Student's t for 1-30 degrees of freedom
+_T95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    """Return the q-th percentile (0-100) of values using linear interpolation."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    pos = (len(ordered) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def t_critical(df: int) -> float:
+    """Two-sided 95% critical value of Student's t."""
+    if df < 1:
+        return float('nan')
+    return _T95[df - 1] if df <= len(_T95) else 1.96
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """
+    Summarize a sample.
+
+    Returns:
+        Count, mean, variance, standard deviation, 95% CI of the mean and
+        p50/p90/p99 (statistics that need more samples are None)
+    """
+    n = len(values)
+    if not n:
+        return {'n': 0}
+    mean = statistics.fmean(values)
+    summary = {
+        'n': n,
+        'mean': mean,
+        'variance': None,
+        'stdev': None,
+        'ci95': None,
+        'min': min(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+    if n > 1:
+        variance = statistics.variance(values, mean)
+        half_width = t_critical(n - 1) * math.sqrt(variance / n)
+        summary.update({
+            'variance': variance,
+            'stdev': math.sqrt(variance),
+            'ci95': [mean - half_width, mean + half_width],
+        })
+    return summary
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def run_stats(session, run_id: str) -> Dict[str, Any]:
+    """
+    Latency, score and rating distributions of a run.
+
+    Items whose output was flagged as the error placeholder count as errors
+    and are left out of the score statistics.
+
+    Returns:
+        ``pairs`` (one entry per case/tool/parameter set) and ``tools``
+        (rolled up per tool and parameter set)
+    """
+    items = session.query(RunItem).filter_by(run_id=int(run_id)).all()
+    item_ids = [item.id for item in items]
+    stars = {}
+    flags = {}
+    if item_ids:
+        stars = {hs.run_item_id: hs.stars for hs in
+                 session.query(HumanScore).filter(HumanScore.run_item_id.in_(item_ids)).all()}
+        flags = {row.run_item_id: row.flag for row in
+                 session.query(ImageHash).filter(ImageHash.run_item_id.in_(item_ids)).all()}
+
+    def _collect(group: List[RunItem]) -> Dict[str, Any]:
+        done = [i for i in group if i.status == 'scored']
+        errors = [i for i in done if flags.get(i.id) == 'error_placeholder']
+        ok = [i for i in done if flags.get(i.id) != 'error_placeholder']
+        return {
+            'trials': len(group),
+            'completed': len(done),
+            'errors': len(errors),
+            'latency': summarize([i.latency for i in done if i.latency is not None]),
+            'score': summarize([s for s in (_to_float(i.score) for i in ok) if s is not None]),
+            'human': summarize([float(stars[i.id]) for i in group if stars.get(i.id) is not None]),
+        }
+
+    by_pair: Dict[tuple, List[RunItem]] = {}
+    by_tool: Dict[tuple, List[RunItem]] = {}
+    for item in items:
+        by_pair.setdefault((item.case_id, item.tool_id, item.params or ''), []).append(item)
+        by_tool.setdefault((item.tool_id, item.params or ''), []).append(item)
+
+    return {
+        'run_id': str(run_id),
+        'pairs': [{'case_id': case_id, 'tool_id': tool_id, 'params': load_params(params), **_collect(group)}
+                  for (case_id, tool_id, params), group in sorted(by_pair.items())],
+        'tools': [{'tool_id': tool_id, 'params': load_params(params), **_collect(group)}
+                  for (tool_id, params), group in sorted(by_tool.items())],
+    }
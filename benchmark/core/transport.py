@@ -0,0 +1,278 @@
+"""
+Provider call transports for benchmark runs.
+
+A transport sits between the runner and a plugin's ``generate`` function.
+The live transport simply calls the plugin, the record transport also stores
+every request/response pair in a cassette store, and the replay transport
+serves recorded responses back without touching the network. Replay runs can
+use the recorded latency of each call or a synthetic latency distribution.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from benchmark.config import CASSETTES_DIR
+from benchmark.core.constants import TRANSPORT_MODES
+from benchmark.utils.image_io import file_digest
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+class RecordedProviderError(Exception):
+    """Raised in replay mode for a call that failed when it was recorded."""
+
+
+def _file_digest(path: Optional[str]) -> Optional[str]:
+    """Return the SHA-256 digest of a file's contents, or None if missing."""
+    if not path or not Path(path).exists():
+        return None
+    return file_digest(path)
+
+
+def request_key(tool_id: str, case: Dict[str, Any], params: Optional[Dict[str, Any]] = None,
+                trial: int = 0) -> str:
+    """
+    Compute a stable key for a plugin request.
+
+    Image paths are replaced by the hash of their contents so that the key
+    identifies what was sent to the provider, not where it lived on disk.
+
+    Args:
+        tool_id: The plugin handling the request
+        case: The test case dictionary passed to the plugin
+        params: Plugin parameters of the request (parameter sweeps)
+        trial: Trial index of the request (repeated trials each get a recording)
+
+    Returns:
+        A hex digest identifying the request
+    """
+    payload = {
+        'tool_id': tool_id,
+        'case': {k: v for k, v in case.items() if k not in ('template_image', 'avatars')},
+        'template': _file_digest(case.get('template_image')),
+        'avatars': [_file_digest(p) for p in case.get('avatars') or []],
+    }
+    if params:
+        # Only added when set, so recordings made without parameters keep their keys
+        payload['params'] = params
+    if trial:
+        # Likewise only for trials after the first
+        payload['trial'] = int(trial)
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LatencyModel:
+    """
+    Latency distribution used when replaying recorded calls.
+
+    Supported specs:
+        ``recorded``                 the latency observed while recording
+        ``none``                     no delay at all
+        ``fixed:SECONDS``            a constant delay
+        ``uniform:LOW,HIGH``         uniformly distributed delay
+        ``normal:MEAN,STDEV``        normally distributed delay, clipped at zero
+        ``lognormal:MEDIAN,SIGMA``   log-normally distributed delay
+    """
+
+    def __init__(self, spec: str = "recorded", seed: Optional[int] = None):
+        self.spec = spec
+        self.kind, _, raw_args = spec.partition(':')
+        self.args = [float(a) for a in raw_args.split(',') if a.strip()]
+        self.rng = random.Random(seed)
+        expected = {'recorded': 0, 'none': 0, 'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if self.kind not in expected:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        if len(self.args) != expected[self.kind]:
+            raise ValueError(f"Latency distribution '{self.kind}' expects {expected[self.kind]} argument(s): {spec}")
+
+    def sample(self, recorded: Optional[float] = None) -> float:
+        """
+        Draw a latency in seconds.
+
+        Args:
+            recorded: The latency observed when the call was recorded
+
+        Returns:
+            A non-negative delay in seconds
+        """
+        if self.kind == 'recorded':
+            return max(recorded or 0.0, 0.0)
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            return max(self.args[0], 0.0)
+        if self.kind == 'uniform':
+            return self.rng.uniform(self.args[0], self.args[1])
+        if self.kind == 'normal':
+            return max(self.rng.gauss(self.args[0], self.args[1]), 0.0)
+        return self.rng.lognormvariate(math.log(self.args[0]), self.args[1])
+
+
+class CassetteStore:
+    """
+    On-disk store of recorded plugin responses.
+
+    Each recording is kept as ``<root>/<tool_id>/<key[:2]>/<key>.json`` holding
+    the observed latency and outcome, plus ``<key>.png`` with the output bytes
+    for successful calls.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else CASSETTES_DIR
+
+    def _paths(self, tool_id: str, key: str) -> Tuple[Path, Path]:
+        base = self.root / tool_id / key[:2]
+        return base / f"{key}.json", base / f"{key}.png"
+
+    def save(self, tool_id: str, key: str, latency: float,
+             image: Optional[Image.Image] = None, error: Optional[str] = None) -> None:
+        """
+        Record the outcome of a plugin call.
+
+        Args:
+            tool_id: The plugin that handled the call
+            key: The request key from ``request_key``
+            latency: Observed wall-clock latency in seconds
+            image: The returned image for successful calls
+            error: The error message for failed calls
+        """
+        meta_path, image_path = self._paths(tool_id, key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        if image is not None:
+            buffer = BytesIO()
+            image.save(buffer, format='PNG')
+            image_path.write_bytes(buffer.getvalue())
+        meta = {
+            'tool_id': tool_id,
+            'key': key,
+            'latency': latency,
+            'error': error,
+            'recorded_at': time.time(),
+        }
+        meta_path.write_text(json.dumps(meta, indent=2))
+
+    def load(self, tool_id: str, key: str) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """
+        Load a recording.
+
+        Returns:
+            A tuple of the recording metadata and the output bytes (None for
+            recorded failures)
+
+        Raises:
+            CassetteMiss: If nothing was recorded for this request
+        """
+        meta_path, image_path = self._paths(tool_id, key)
+        if not meta_path.exists():
+            raise CassetteMiss(f"No recording for {tool_id} request {key[:12]} in {self.root}")
+        meta = json.loads(meta_path.read_text())
+        data = image_path.read_bytes() if meta.get('error') is None else None
+        return meta, data
+
+
+class LiveTransport:
+    """Call the plugin directly, off the event loop."""
+
+    mode = "live"
+
+    async def generate(self, tool_id: str, module: Any, case: Dict[str, Any], trial: int = 0,
+                       **kwargs) -> Image.Image:
+        """
+        Run a plugin's ``generate`` for a test case.
+
+        Args:
+            tool_id: The plugin ID
+            module: The imported plugin module
+            case: The test case dictionary
+            trial: Trial index of the item (part of the record/replay key)
+            **kwargs: Extra keyword arguments for the plugin (e.g. ``cancel_event``, ``params``)
+
+        Returns:
+            The image produced by the plugin
+        """
+        return await asyncio.to_thread(module.generate, case, **kwargs)
+
+
+class RecordTransport(LiveTransport):
+    """Call the plugin and record each request/response pair."""
+
+    mode = "record"
+
+    def __init__(self, store: CassetteStore):
+        self.store = store
+
+    async def generate(self, tool_id: str, module: Any, case: Dict[str, Any], trial: int = 0,
+                       **kwargs) -> Image.Image:
+        key = request_key(tool_id, case, kwargs.get('params'), trial)
+        start = time.perf_counter()
+        try:
+            img = await super().generate(tool_id, module, case, **kwargs)
+        except Exception as e:
+            self.store.save(tool_id, key, time.perf_counter() - start, error=str(e))
+            raise
+        latency = time.perf_counter() - start
+        if img is not None:
+            self.store.save(tool_id, key, latency, image=img)
+            logger.debug(f"Recorded {tool_id} request {key[:12]} ({latency:.3f}s)")
+        return img
+
+
+class ReplayTransport:
+    """Serve recorded responses without calling the plugin."""
+
+    mode = "replay"
+
+    def __init__(self, store: CassetteStore, latency: Optional[LatencyModel] = None):
+        self.store = store
+        self.latency = latency or LatencyModel()
+
+    async def generate(self, tool_id: str, module: Any, case: Dict[str, Any], trial: int = 0,
+                       **kwargs) -> Image.Image:
+        key = request_key(tool_id, case, kwargs.get('params'), trial)
+        meta, data = self.store.load(tool_id, key)
+        await asyncio.sleep(self.latency.sample(meta.get('latency')))
+        if data is None:
+            raise RecordedProviderError(meta.get('error') or 'recorded failure')
+        img = Image.open(BytesIO(data))
+        img.load()
+        return img
+
+
+def get_transport(mode: str = "live", cassette_dir: Optional[str] = None,
+                  latency: str = "recorded", seed: Optional[int] = None):
+    """
+    Build a transport for a run.
+
+    Args:
+        mode: One of ``live``, ``record`` or ``replay``
+        cassette_dir: Cassette store directory (defaults to ``CASSETTES_DIR``)
+        latency: Latency distribution spec used in replay mode
+        seed: Seed for synthetic latency sampling
+
+    Returns:
+        A transport instance
+    """
+    if mode not in TRANSPORT_MODES:
+        raise ValueError(f"Unknown transport mode: {mode}")
+    if mode == "live":
+        return LiveTransport()
+    store = CassetteStore(Path(cassette_dir) if cassette_dir else None)
+    if mode == "record":
+        return RecordTransport(store)
+    return ReplayTransport(store, LatencyModel(latency, seed=seed))
@@ -0,0 +1,134 @@
+"""
+Environment checks and import-time profiling for the CLI.
+
+``profile_imports`` runs a fresh interpreter with ``-X importtime`` and
+parses its report, so import costs are measured without the modules already
+loaded in this process.
+"""
+
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Modules whose import cost matters most for scripted CLI use
+DEFAULT_PROFILE_MODULES = ("benchmark.cli", "benchmark.core.runner")
+
+# (import name, distribution) pairs from requirements.txt
+REQUIRED_PACKAGES = [
+    ("fastapi", "fastapi"),
+    ("uvicorn", "uvicorn"),
+    ("click", "click"),
+    ("pydantic", "pydantic"),
+    ("sqlalchemy", "sqlalchemy"),
+    ("jinja2", "jinja2"),
+    ("PIL", "pillow"),
+    ("numpy", "numpy"),
+    ("dotenv", "python-dotenv"),
+    ("requests", "requests"),
+]
+OPTIONAL_PACKAGES = [
+    ("replicate", "replicate", "baseline_replicate plugin"),
+    ("openai", "openai", "generate-cases"),
+    ("cv2", "opencv-python", "face detection for multi-face cases"),
+]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def check_environment() -> List[Dict[str, Any]]:
+    """
+    Check the Python version, installed packages and provider credentials.
+
+    Returns:
+        One entry per check with ``name``, ``ok``, ``detail`` and ``optional``
+    """
+    checks = [{
+        'name': 'python',
+        'ok': sys.version_info >= (3, 10),
+        'detail': f"{sys.version.split()[0]} (3.10+ required)",
+        'optional': False,
+    }]
+    for module, dist in REQUIRED_PACKAGES:
+        found = importlib.util.find_spec(module) is not None
+        checks.append({'name': dist, 'ok': found, 'detail': 'installed' if found else 'missing',
+                       'optional': False})
+    for module, dist, purpose in OPTIONAL_PACKAGES:
+        found = importlib.util.find_spec(module) is not None
+        checks.append({'name': dist, 'ok': found,
+                       'detail': 'installed' if found else f"missing (needed for {purpose})",
+                       'optional': True})
+    token = bool(os.getenv("REPLICATE_API_TOKEN"))
+    checks.append({'name': 'REPLICATE_API_TOKEN', 'ok': token,
+                   'detail': 'set' if token else 'not set (live Replicate calls will fail)',
+                   'optional': True})
+    return checks
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        One entry per imported module with ``name``, ``self_us``,
+        ``cumulative_us`` and nesting ``depth`` (0 for top-level imports)
+    """
+    entries = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append({
+            'name': name,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': max(len(indent) - 1, 0) // 2,
+        })
+    return entries
+
+
+def profile_imports(module: str, top: int = 15) -> Dict[str, Any]:
+    """
+    Measure the cost of importing a module in a fresh interpreter.
+
+    Args:
+        module: Dotted module name to import
+        top: Number of slowest imports (by cumulative time) to return
+
+    Returns:
+        Import time of the module (and its parent packages), import time of
+        interpreter startup, wall time of the whole interpreter run, module
+        count and the slowest imports
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    entries = parse_importtime(proc.stderr)
+    # Top-level entries are the module (its parent packages nest inside it) and interpreter
+    # startup (site, encodings); a failed import may leave only a parent package
+    own = [e for e in entries if e['depth'] == 0 and (module == e['name'] or module.startswith(e['name'] + '.'))]
+    total_us = max((e['cumulative_us'] for e in own), default=0)
+    startup_us = sum(e['cumulative_us'] for e in entries if e['depth'] == 0 and e not in own)
+    result = {
+        'module': module,
+        'total_ms': total_us / 1000.0,
+        'startup_ms': startup_us / 1000.0,
+        'wall_ms': wall * 1000.0,
+        'modules': len(entries),
+        'slowest': [
+            {'name': e['name'], 'self_ms': e['self_us'] / 1000.0, 'cumulative_ms': e['cumulative_us'] / 1000.0}
+            for e in sorted(entries, key=lambda e: e['cumulative_us'], reverse=True)[:top]
+        ],
+        'error': None,
+    }
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        result['error'] = errors[-1] if errors else f"exit code {proc.returncode}"
+    return result
@@ -0,0 +1,218 @@
+"""
+End-to-end throughput benchmark for the benchmark framework itself.
+
+Drives ``start_run``/``execute_run_async`` with the ``synthetic`` plugin while
+many simulated WebSocket clients are connected to the FastAPI app, and reports
+throughput, event loop lag, status-update latency, database write rate and
+peak RSS as a JSON baseline.
+"""
+
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import datetime
+import itertools
+from typing import Any, Dict, List
+
+from benchmark import __version__
+from benchmark.core.stats import percentile
+
+
+def _summary_ms(values: List[float]) -> Dict[str, Any]:
+    """Summarize second-valued samples in milliseconds."""
+    def ms(v):
+        return round(v * 1000, 3) if v is not None else None
+    return {
+        'count': len(values),
+        'p50': ms(percentile(values, 50)),
+        'p99': ms(percentile(values, 99)),
+        'max': ms(max(values) if values else None),
+    }
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+class _TimedManager:
+    """Wrap the event bus and stamp when each message is published.
+
+    Every message gets a ``perf_seq`` number, so clients can match what they
+    receive to its stamp (run state messages share their other fields).
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.stamps: Dict[int, float] = {}
+        self._seq = itertools.count()
+
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        seq = next(self._seq)
+        self.stamps[seq] = time.perf_counter()
+        await self.inner.broadcast({**message, 'perf_seq': seq})
+
+
+class _SimulatedClient:
+    """A WebSocket client speaking ASGI directly to the app, without a network."""
+
+    def __init__(self, app, path: str, stamps: Dict[int, float]):
+        self.app = app
+        self.path = path
+        self.stamps = stamps
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.latencies: List[float] = []
+        self.received = 0
+
+    async def run(self) -> None:
+        scope = {
+            'type': 'websocket',
+            'asgi': {'version': '3.0'},
+            'scheme': 'ws',
+            'path': self.path,
+            'raw_path': self.path.encode(),
+            'root_path': '',
+            'query_string': b'',
+            'headers': [],
+            'client': ('127.0.0.1', 0),
+            'server': ('perf', 80),
+            'subprotocols': [],
+            'state': {},
+        }
+        await self.inbox.put({'type': 'websocket.connect'})
+        await self.app(scope, self.inbox.get, self._send)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if message['type'] == 'websocket.accept':
+            self.accepted.set()
+        elif message['type'] == 'websocket.send':
+            now = time.perf_counter()
+            data = json.loads(message.get('text') or message.get('bytes'))
+            if data.get('type') == 'perf_drain':
+                self.drained.set()
+                return
+            self.received += 1
+            sent = self.stamps.get(data.get('perf_seq'))
+            if sent is not None:
+                self.latencies.append(now - sent)
+
+    async def close(self) -> None:
+        await self.inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+
+
+async def _monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Sample how late the event loop wakes up from a short sleep."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(time.perf_counter() - start - interval, 0.0))
+
+
+async def run_perf_async(cases: int = 200, clients: int = 50, concurrency: int = 32,
+                         latency: str = "lognormal:0.05,0.5", failure_rate: float = 0.0,
+                         output_size: str = "256x256") -> Dict[str, Any]:
+    """
+    Run the throughput benchmark and return the JSON-serializable results.
+
+    Args:
+        cases: Number of synthetic test cases (one run item each)
+        clients: Number of simulated WebSocket clients watching the run
+        concurrency: Maximum concurrent items in the runner
+        latency: Latency distribution spec for the synthetic plugin
+        failure_rate: Failure probability for the synthetic plugin
+        output_size: Output image size for the synthetic plugin
+
+    Returns:
+        A dictionary of measurements
+    """
+    os.environ['SYNTHETIC_LATENCY'] = latency
+    os.environ['SYNTHETIC_FAILURE_RATE'] = str(failure_rate)
+    os.environ['SYNTHETIC_OUTPUT_SIZE'] = output_size
+
+    from sqlalchemy import event
+    from benchmark.config import RUNS_DIR
+    RUNS_DIR.mkdir(parents=True, exist_ok=True)
+    from benchmark.core.db import get_engine
+    from benchmark.core.runner import start_run, execute_run_async
+    from benchmark.web.main import app, bus
+
+    commits = [0]
+
+    def _on_commit(conn):
+        commits[0] += 1
+
+    engine = get_engine()
+    event.listen(engine, 'commit', _on_commit)
+    try:
+        synthetic_cases = [{'id': f'perf_{i:05d}'} for i in range(cases)]
+        run_id = start_run(tool_ids=['synthetic'], cases=synthetic_cases)
+
+        # Updates take the production path: bus -> fan-out -> the run's viewers
+        await bus.start()
+        timed = _TimedManager(bus)
+        sim_clients = [_SimulatedClient(app, f'/api/run/{run_id}', timed.stamps) for _ in range(clients)]
+        client_tasks = [asyncio.create_task(c.run()) for c in sim_clients]
+        await asyncio.gather(*(c.accepted.wait() for c in sim_clients))
+
+        lag_samples: List[float] = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_monitor_loop_lag(lag_samples, stop))
+
+        commits[0] = 0
+        start = time.perf_counter()
+        await execute_run_async(run_id, timed, max_concurrency=concurrency)
+        duration = time.perf_counter() - start
+        run_commits = commits[0]
+        # Polling buses deliver after a delay; wait until every client has seen the whole run
+        await bus.publish({'type': 'perf_drain', 'run_id': run_id})
+        await asyncio.wait_for(asyncio.gather(*(c.drained.wait() for c in sim_clients)), timeout=30)
+
+        stop.set()
+        await monitor
+        for c in sim_clients:
+            await c.close()
+        await asyncio.gather(*client_tasks, return_exceptions=True)
+    finally:
+        event.remove(engine, 'commit', _on_commit)
+        await bus.stop()
+
+    update_latencies = [lat for c in sim_clients for lat in c.latencies]
+    return {
+        'benchmark': 'perf',
+        'version': __version__,
+        'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
+        'config': {
+            'cases': cases,
+            'clients': clients,
+            'concurrency': concurrency,
+            'latency': latency,
+            'failure_rate': failure_rate,
+            'output_size': output_size,
+            'event_bus': os.getenv('BENCHMARK_EVENT_BUS') or 'sqlite',
+        },
+        'run_id': run_id,
+        'items': cases,
+        'duration_s': round(duration, 3),
+        'items_per_sec': round(cases / duration, 2) if duration else None,
+        'event_loop_lag_ms': _summary_ms(lag_samples),
+        'status_update_latency_ms': _summary_ms(update_latencies),
+        'messages_received': sum(c.received for c in sim_clients),
+        'db': {
+            'commits': run_commits,
+            'commits_per_sec': round(run_commits / duration, 2) if duration else None,
+        },
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def run_perf(**kwargs) -> Dict[str, Any]:
+    """Synchronous wrapper around ``run_perf_async``."""
+    return asyncio.run(run_perf_async(**kwargs))
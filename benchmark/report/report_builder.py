@@ -1,10 +1,11 @@
 import os
 import base64
+import html
 from pathlib import Path
 
 from benchmark.config import RUNS_DIR
 from benchmark.core.db import SessionLocal
-from benchmark.core.models import RunItem, HumanScore
+from benchmark.core.models import RunItem, HumanScore, item_image_path
 
 def build_report(run_id: str) -> str:
     """Build a static HTML report for the given run, embedding images and scores."""
@@ -27,8 +28,8 @@ def build_report(run_id: str) -> str:
         # Human score if exists
         hs = session.query(HumanScore).filter_by(run_item_id=item.id).first()
         stars = hs.stars if hs else ''
-        # Image file path
-        img_path = Path(RUNS_DIR) / str(run_id) / item.tool_id / f"{item.case_id}.png"
+        # Image file path (trials and sweep parameters get their own files)
+        img_path = item_image_path(item) or Path(RUNS_DIR) / str(run_id) / item.tool_id / f"{item.case_id}.png"
         img_src = ''
         if img_path.exists():
             with open(img_path, 'rb') as imgf:
@@ -38,8 +39,8 @@ def build_report(run_id: str) -> str:
         img_tag = f'<img src="{img_src}" width="200"/>' if img_src else ''
         html_lines.append(
             '<tr>'
-            f'<td>{item.case_id}</td>'
-            f'<td>{item.tool_id}</td>'
+            f'<td>{html.escape(str(item.case_id))}</td>'
+            f'<td>{item.tool_id}{" " + html.escape(item.params) if item.params else ""}</td>'
             f'<td>{item.score}</td>'
             f'<td>{stars}</td>'
             f'<td>{img_tag}</td>'
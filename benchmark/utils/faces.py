@@ -0,0 +1,126 @@
+"""
+Face region helpers for multi-face swaps.
+
+Faces are located with OpenCV's Haar cascade when ``opencv-python`` is
+installed. Without it, or when fewer faces than requested are found, the
+template is split into equal vertical strips, one per person, which matches
+the side-by-side compositions produced by ``generate_cases``. Regions are
+always ordered left to right.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass
+class FaceRegion:
+    """A region of the template handled by one per-face swap."""
+    crop: Box   # box sent to the provider, with surrounding context
+    paste: Box  # box copied back from the result, within ``crop``
+
+
+def _clip(box: Sequence[float], width: int, height: int) -> Box:
+    left, top, right, bottom = box
+    return (max(int(left), 0), max(int(top), 0), min(int(right), width), min(int(bottom), height))
+
+
+def detect_faces(image: Image.Image) -> List[Box]:
+    """Detect face boxes with OpenCV if it is available."""
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        return []
+    gray = np.asarray(image.convert('L'))
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    min_side = max(min(image.size) // 20, 24)
+    faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side))
+    return [(int(x), int(y), int(x + w), int(y + h)) for (x, y, w, h) in faces]
+
+
+def detect_face_regions(image: Image.Image, count: int, context: float = 1.0) -> List[FaceRegion]:
+    """
+    Find ``count`` face regions in an image, ordered left to right.
+
+    Args:
+        image: The template image
+        count: Number of faces to locate
+        context: Context around each detected face to include in the crop,
+            as a multiple of the face size on each side
+
+    Returns:
+        A list of ``count`` face regions
+    """
+    width, height = image.size
+    faces = detect_faces(image)
+    if len(faces) >= count:
+        # Keep the largest faces, then order them left to right
+        faces = sorted(faces, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)[:count]
+        regions = []
+        for left, top, right, bottom in sorted(faces, key=lambda b: b[0]):
+            fw, fh = right - left, bottom - top
+            crop = _clip((left - fw * context, top - fh * context, right + fw * context, bottom + fh * context),
+                         width, height)
+            paste = _clip((left - fw * 0.25, top - fh * 0.25, right + fw * 0.25, bottom + fh * 0.25),
+                          width, height)
+            regions.append(FaceRegion(crop=crop, paste=paste))
+        return regions
+
+    if faces:
+        logger.info(f"Found {len(faces)} faces but need {count}; falling back to vertical strips")
+    strip = width / count
+    overlap = int(strip * 0.15)
+    regions = []
+    for i in range(count):
+        core = _clip((i * strip, 0, (i + 1) * strip, height), width, height)
+        crop = _clip((core[0] - overlap, 0, core[2] + overlap, height), width, height)
+        regions.append(FaceRegion(crop=crop, paste=core))
+    return regions
+
+
+def _feathered_mask(size: Tuple[int, int], feather: int) -> Image.Image:
+    """A rectangular mask that fades out towards its edges."""
+    mask = Image.new('L', size, 0)
+    inset = min(feather, size[0] // 4, size[1] // 4)
+    ImageDraw.Draw(mask).rectangle((inset, inset, size[0] - inset - 1, size[1] - inset - 1), fill=255)
+    if inset:
+        mask = mask.filter(ImageFilter.GaussianBlur(inset / 2))
+    return mask
+
+
+def composite_regions(base: Image.Image, results: List[Tuple[FaceRegion, Image.Image]],
+                      feather: int = 8) -> Image.Image:
+    """
+    Paste per-face results back into the template.
+
+    Each result is resized to its crop box if the provider changed its size,
+    and only the region's paste box is blended into the output.
+
+    Args:
+        base: The original template image
+        results: Pairs of face region and the swapped crop for that region
+        feather: Width in pixels of the blended border
+
+    Returns:
+        A new image with all faces swapped
+    """
+    output = base.convert('RGB')
+    for region, swapped in results:
+        crop_w = region.crop[2] - region.crop[0]
+        crop_h = region.crop[3] - region.crop[1]
+        swapped = swapped.convert('RGB')
+        if swapped.size != (crop_w, crop_h):
+            swapped = swapped.resize((crop_w, crop_h), Image.LANCZOS)
+        rel = (region.paste[0] - region.crop[0], region.paste[1] - region.crop[1],
+               region.paste[2] - region.crop[0], region.paste[3] - region.crop[1])
+        patch = swapped.crop(rel)
+        output.paste(patch, region.paste[:2], _feathered_mask(patch.size, feather))
+    return output
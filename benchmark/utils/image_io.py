@@ -1,3 +1,8 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
 from PIL import Image
 
 def read_image(path: str) -> Image.Image:
@@ -6,4 +11,23 @@ def read_image(path: str) -> Image.Image:
 
 def save_image(image: Image.Image, path: str):
     """Save an image to disk."""
-    image.save(path)
\ No newline at end of file
+    image.save(path)
+
+def downscale_rgb(image: Image.Image, size: int) -> np.ndarray:
+    """Downscale an image to a ``(size, size, 3)`` uint8 RGB array."""
+    img = image.convert('RGB').resize((size, size), Image.BILINEAR, reducing_gap=2.0)
+    return np.asarray(img, dtype=np.uint8)
+
+
+@lru_cache(maxsize=4096)
+def _digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, memoized until the file changes."""
+    st = os.stat(path)
+    return _digest(os.path.abspath(path), st.st_mtime_ns, st.st_size)
@@ -0,0 +1,64 @@
+"""
+Perceptual hashing helpers.
+
+Images are reduced to 64-bit difference hashes (dHash): the image is shrunk
+to 9x8 grayscale and each bit records whether a pixel is brighter than its
+right-hand neighbour. Visually similar images have hashes a small Hamming
+distance apart, so comparing two images costs one XOR and a popcount.
+"""
+
+import os
+from functools import lru_cache
+from typing import Union
+
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """
+    Compute the difference hash of an image.
+
+    Args:
+        image: The image to hash
+        size: Hash side length; the hash has ``size * size`` bits
+
+    Returns:
+        The hash as an unsigned integer
+    """
+    small = image.convert('L').resize((size + 1, size), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+@lru_cache(maxsize=1024)
+def _file_dhash(path: str, mtime_ns: int, size: int) -> int:
+    with Image.open(path) as img:
+        return dhash(img)
+
+
+def file_dhash(path: str) -> int:
+    """Difference hash of an image file, memoized until the file changes."""
+    st = os.stat(path)
+    return _file_dhash(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+def to_hex(value: int) -> str:
+    """Fixed-width hex form used for storage."""
+    return f"{value:016x}"
+
+
+def from_hex(value: Union[str, int]) -> int:
+    """Parse a stored hash."""
+    return value if isinstance(value, int) else int(value, 16)
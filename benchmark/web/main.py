@@ -6,19 +6,31 @@ viewing results, and generating reports.
 """
 
 import os
+import json
 import asyncio
 import logging
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, FileResponse
 
 from benchmark.web.sockets import ConnectionManager
-from benchmark.core.models import load_test_cases, HumanScore
-from benchmark.core.runner import start_run, execute_run_async
+from benchmark.core.models import load_test_cases, ImageHash
+from benchmark.core.diff import diff_runs
+from benchmark.core.hash_index import DUPLICATE_DISTANCE, find_similar, group_duplicates, run_flags
+from benchmark.core.stats import run_stats
+from benchmark.core.budget import Budget
+from benchmark.core.ratings import parse_ratings, save_ratings
+from benchmark.core.params import load_params
+from benchmark.utils.phash import HASH_BITS, from_hex
+from benchmark.core.runner import start_run
+from benchmark.core.scheduler import CONTROL_MESSAGES, Scheduler
+from benchmark.core.events import get_event_bus
+from benchmark.core.transport import get_transport
+from benchmark.core.registry import list_plugins
 from benchmark.core.db import SessionLocal
 from benchmark.config import RUNS_DIR, DATASETS_DIR
 from benchmark.report.report_builder import build_report
@@ -45,6 +57,40 @@ templates = Jinja2Templates(directory=templates_dir)
 # Initialize WebSocket connection manager
 manager = ConnectionManager()
 
+# Progress events go through the event bus so the sockets of every worker receive them
+bus = get_event_bus()
+
+
+async def _fan_out(message: Dict[str, Any]) -> None:
+    """Deliver a bus event to this worker's sockets (only the run's viewers for run events)."""
+    if message.get('type') in CONTROL_MESSAGES:
+        return
+    run_id = message.get('run_id')
+    if run_id is None:
+        await manager.broadcast(message)
+    else:
+        await manager.broadcast_run(str(run_id), message)
+
+
+bus.subscribe(_fan_out)
+
+
+@app.on_event('startup')
+async def start_event_bus() -> None:
+    """Start receiving events published by any worker."""
+    await bus.start()
+
+
+@app.on_event('shutdown')
+async def stop_event_bus() -> None:
+    """Flush pending events and disconnect from the bus."""
+    await bus.stop()
+
+# Scheduler owning all runs started through the web app
+scheduler = Scheduler()
+# Control requests for runs owned by other workers arrive over the bus
+scheduler.listen(bus)
+
 
 @app.get('/', response_class=HTMLResponse)
 async def get_index(request: Request) -> HTMLResponse:
@@ -91,14 +137,30 @@ async def get_test_cases() -> List[Dict[str, Any]]:
 
 
 @app.get('/api/tools')
-async def get_tools() -> List[str]:
+async def get_tools(details: bool = False) -> List[Any]:
     """
-    List available face-swapping tools.
+    List available face-swapping tools from the plugin registry.
     
+    Args:
+        details: Return plugin metadata dictionaries instead of bare IDs
+        
     Returns:
-        A list of tool IDs available for benchmarking
+        A list of tool IDs (or metadata) available for benchmarking
     """
-    return ['baseline_replicate']
+    plugins = list_plugins()
+    if details:
+        return [info.to_dict() for info in plugins]
+    return [info.id for info in plugins]
+
+
+def _positive_int_option(options: Dict[str, Any], key: str) -> int:
+    """Read a run option that must be a positive integer (default 1)."""
+    value = options.get(key, 1)
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"{key} must be a positive integer, got {value!r}")
+    return value
 
 
 @app.post('/api/run')
@@ -107,45 +169,166 @@ async def post_run(payload: Dict[str, Any]) -> Dict[str, str]:
     Start a new benchmark run and broadcast progress via WebSocket.
     
     Args:
-        payload: A dictionary containing case_ids and tool_ids to run
+        payload: A dictionary containing case_ids and tool_ids to run, plus
+            optional ``options`` (``transport``, ``cassette_dir``, ``replay_latency``,
+            ``priority``, ``repeats``, ``budget``, ``array_size``, ``params``)
         
     Returns:
         A dictionary with the run_id of the created run
+
+    Raises:
+        HTTPException: 400 if an option is invalid or the cases/tools are unknown
     """
     case_ids = payload.get('case_ids', []) or []
     tool_ids = payload.get('tool_ids', []) or []
+    options = payload.get('options', {}) or {}
+    
+    try:
+        transport = get_transport(
+            options.get('transport', 'live'),
+            cassette_dir=options.get('cassette_dir'),
+            latency=options.get('replay_latency', 'recorded')
+        )
+        budget = Budget.from_options(options.get('budget'))
+        repeats = _positive_int_option(options, 'repeats')
+        priority = _positive_int_option(options, 'priority')
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     logger.info(f"Starting new benchmark run with {len(case_ids)} cases and {len(tool_ids)} tools")
     
     # Start the run and get the run ID
-    run_id = start_run(case_ids, tool_ids)
+    try:
+        run_id = start_run(case_ids, tool_ids, repeats=repeats,
+                           array_size=options.get('array_size'), param_grid=options.get('params'))
+    except (ValueError, LookupError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Execute run in background
-    asyncio.create_task(execute_run_async(run_id, manager))
+    # Hand the run to the scheduler, which executes it in the background
+    await scheduler.submit(run_id, bus, transport, priority=priority, budget=budget)
     
     return {'run_id': run_id}
 
 
+async def _control_run(run_id: str, action: str, priority: Optional[int] = None) -> Dict[str, Any]:
+    """Apply a control action to an active run, whichever worker owns it, and report the outcome."""
+    return await scheduler.control(run_id, action, priority)
+
+
+@app.get('/api/runs/active')
+async def get_active_runs() -> List[Dict[str, Any]]:
+    """
+    List runs currently owned by the scheduler.
+    
+    Returns:
+        A list of run summaries (state, priority and item counts)
+    """
+    return scheduler.status()
+
+
+@app.post('/api/run/{run_id}/cancel')
+async def post_cancel_run(run_id: str) -> Dict[str, Any]:
+    """Cancel a run, aborting its in-flight provider calls."""
+    return await _control_run(run_id, 'cancel')
+
+
+@app.post('/api/run/{run_id}/pause')
+async def post_pause_run(run_id: str) -> Dict[str, Any]:
+    """Pause a run; items already in flight are allowed to finish."""
+    return await _control_run(run_id, 'pause')
+
+
+@app.post('/api/run/{run_id}/resume')
+async def post_resume_run(run_id: str) -> Dict[str, Any]:
+    """Resume a paused run."""
+    return await _control_run(run_id, 'resume')
+
+
+@app.post('/api/run/{run_id}/priority')
+async def post_run_priority(run_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Change a run's priority.
+    
+    Args:
+        run_id: The run to re-prioritize
+        payload: A dictionary containing the new ``priority`` (higher gets more slots)
+    """
+    try:
+        priority = int(payload.get('priority'))
+    except (TypeError, ValueError):
+        return {'status': 'error', 'message': 'priority must be an integer'}
+    return await _control_run(run_id, 'priority', priority)
+
+
 @app.websocket('/api/run/{run_id}')
 async def websocket_run(websocket: WebSocket, run_id: str) -> None:
     """
     WebSocket endpoint for receiving real-time updates on a run.
     
+    Clients may also send control messages of the form
+    ``{"type": "control", "action": "pause" | "resume" | "cancel" | "priority", "priority": N}``;
+    the outcome is sent back to that client only. Rating changes on the
+    run's items are pushed as ``{"type": "rating", "run_id", "ratings"}``.
+    
     Args:
         websocket: The WebSocket connection
         run_id: The ID of the run to monitor
     """
-    await manager.connect(websocket)
+    await manager.connect(websocket, run_id)
     try:
         while True:
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                continue
+            if not isinstance(message, dict) or message.get('type') != 'control':
+                continue
+            try:
+                priority = int(message['priority']) if 'priority' in message else None
+            except (TypeError, ValueError):
+                priority = None
+            result = await _control_run(run_id, str(message.get('action')), priority)
+            await websocket.send_json({'type': 'control', 'run_id': run_id,
+                                       'action': message.get('action'), **result})
     except WebSocketDisconnect:
         manager.disconnect(websocket)
         logger.info(f"WebSocket disconnected for run {run_id}")
 
 
+async def _save_ratings(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Save ratings in one transaction and notify the viewers of each affected run."""
+    try:
+        ratings = parse_ratings(entries)
+    except ValueError as e:
+        return {'status': 'error', 'message': str(e)}
+    if not ratings:
+        return {'status': 'success', 'saved': 0}
+    
+    session = SessionLocal()
+    try:
+        by_run, unknown = save_ratings(session, ratings)
+    except Exception as e:
+        session.rollback()
+        logger.exception(f"Error saving ratings: {e}")
+        return {'status': 'error', 'message': str(e)}
+    finally:
+        session.close()
+    
+    for run_id, run_ratings in by_run.items():
+        await bus.publish({
+            'type': 'rating',
+            'run_id': run_id,
+            'ratings': [{'run_item_id': item_id, 'stars': stars} for item_id, stars in run_ratings.items()],
+        })
+    result = {'status': 'success', 'saved': sum(len(r) for r in by_run.values())}
+    if unknown:
+        result['unknown'] = unknown
+    return result
+
+
 @app.post('/api/rate')
-async def post_rate(payload: Dict[str, Any]) -> Dict[str, str]:
+async def post_rate(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Save human rating for a run item.
     
@@ -155,33 +338,32 @@ async def post_rate(payload: Dict[str, Any]) -> Dict[str, str]:
     Returns:
         A dictionary with status indicator
     """
-    run_item_id = payload.get('run_item_id')
-    stars = payload.get('stars')
-    
-    if not run_item_id or not stars:
+    if not payload.get('run_item_id') or not payload.get('stars'):
         return {'status': 'error', 'message': 'Missing required fields'}
+    result = await _save_ratings([payload])
+    if result.get('unknown'):
+        return {'status': 'error', 'message': f"Unknown run item {payload.get('run_item_id')}"}
+    return result
+
+
+@app.post('/api/rate/bulk')
+async def post_rate_bulk(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Save many human ratings in a single transaction.
     
-    session = SessionLocal()
-    try:
-        # Update or insert human score
-        existing = session.query(HumanScore).filter_by(run_item_id=run_item_id).first()
-        if existing:
-            existing.stars = int(stars)
-            logger.info(f"Updated rating for run item {run_item_id}: {stars} stars")
-        else:
-            hs = HumanScore(run_item_id=run_item_id, stars=int(stars))
-            session.add(hs)
-            logger.info(f"Created new rating for run item {run_item_id}: {stars} stars")
-        
-        session.commit()
-        return {'status': 'success'}
+    Viewers of each affected run receive a ``{"type": "rating", "run_id", "ratings"}`` event.
+    
+    Args:
+        payload: A dictionary with ``ratings``, a list of ``{"run_item_id", "stars"}``
         
-    except Exception as e:
-        session.rollback()
-        logger.exception(f"Error saving rating: {e}")
-        return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
+    Returns:
+        A dictionary with status indicator, the number of ratings saved and
+        any unknown run item IDs
+    """
+    entries = payload.get('ratings')
+    if not isinstance(entries, list):
+        return {'status': 'error', 'message': 'ratings must be a list'}
+    return await _save_ratings(entries)
 
 
 @app.get('/api/run/{run_id}/status')
@@ -214,7 +396,10 @@ async def get_run_status(run_id: str) -> List[Dict[str, Any]]:
                 'tool_id': item.tool_id,
                 'status': item.status,
                 'image_url': item.image_url,
-                'score': item.score
+                'score': item.score,
+                'trial': item.trial or 0,
+                'latency': item.latency,
+                'params': load_params(item.params)
             })
             logger.debug(f"Item status: {item.case_id}/{item.tool_id} = {item.status}")
         
@@ -226,6 +411,124 @@ async def get_run_status(run_id: str) -> List[Dict[str, Any]]:
         session.close()
 
 
+@app.get('/api/run/{run_id}/flags')
+async def get_run_flags(run_id: str) -> List[Dict[str, Any]]:
+    """
+    List outputs of a run flagged by the perceptual-hash index.
+    
+    Args:
+        run_id: The ID of the run
+        
+    Returns:
+        Flagged outputs (``unchanged_template`` or ``error_placeholder``)
+    """
+    session = SessionLocal()
+    try:
+        return run_flags(session, run_id)
+    finally:
+        session.close()
+
+
+@app.get('/api/run/{run_id}/stats')
+async def get_run_stats(run_id: str) -> Dict[str, Any]:
+    """
+    Latency, score and rating distributions of a run.
+    
+    Args:
+        run_id: The ID of the run
+        
+    Returns:
+        Per case/tool and per tool summaries (mean, variance, 95% CI, percentiles)
+    """
+    session = SessionLocal()
+    try:
+        return run_stats(session, run_id)
+    finally:
+        session.close()
+
+
+@app.get('/api/hashes/similar')
+async def get_similar_images(run_item_id: Optional[int] = None, dhash: Optional[str] = None,
+                             max_distance: int = Query(DUPLICATE_DISTANCE, ge=0, le=HASH_BITS),
+                             kind: Optional[str] = None,
+                             limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Find indexed images perceptually similar to a run item's output or to a hash.
+    
+    Args:
+        run_item_id: Use this item's output hash as the query
+        dhash: Hex dHash to query with instead
+        max_distance: Maximum Hamming distance (of 64 bits)
+        kind: Restrict results to ``output``, ``template`` or ``avatar``
+        limit: Maximum number of results
+        
+    Returns:
+        Matching images, nearest first, with their distance
+    """
+    session = SessionLocal()
+    try:
+        if run_item_id is not None:
+            row = session.query(ImageHash).filter_by(run_item_id=run_item_id, kind='output').first()
+            if row is None:
+                return []
+            dhash = row.dhash
+        if not dhash:
+            return []
+        try:
+            value = from_hex(dhash)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid dhash {dhash!r}; expected a hex string")
+        return find_similar(session, value, max_distance, kind=kind, limit=limit)
+    finally:
+        session.close()
+
+
+@app.get('/api/hashes/duplicates')
+async def get_duplicate_groups(run_ids: Optional[str] = None,
+                               max_distance: int = Query(DUPLICATE_DISTANCE, ge=0, le=HASH_BITS)
+                               ) -> List[List[Dict[str, Any]]]:
+    """
+    Group near-duplicate outputs across tools and runs.
+    
+    Args:
+        run_ids: Optional comma-separated run IDs to restrict the search to
+        max_distance: Maximum Hamming distance within a group
+        
+    Returns:
+        Groups of near-duplicate outputs, largest first
+    """
+    ids = [int(r) for r in run_ids.split(',') if r.strip()] if run_ids else None
+    session = SessionLocal()
+    try:
+        return group_duplicates(session, ids, max_distance)
+    finally:
+        session.close()
+
+
+@app.get('/api/diff/{run_a}/{run_b}')
+async def get_run_diff(run_a: str, run_b: str, top: int = 20, size: int = 128) -> Dict[str, Any]:
+    """
+    Compare two runs and rank case/tool pairs by visual change.
+    
+    Args:
+        run_a: Baseline run ID
+        run_b: Run to compare against the baseline
+        top: Number of most-changed pairs that get heatmap thumbnails
+        size: Side of the downscaled comparison images
+        
+    Returns:
+        Ranked pairs with SSIM, pixel delta and heatmap URLs
+    """
+    def _diff() -> Dict[str, Any]:
+        session = SessionLocal()
+        try:
+            return diff_runs(session, run_a, run_b, size=size, top=top)
+        finally:
+            session.close()
+    
+    return await asyncio.to_thread(_diff)
+
+
 @app.get('/api/report/{run_id}')
 async def get_report(run_id: str) -> FileResponse:
     """
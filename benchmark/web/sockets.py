@@ -6,7 +6,7 @@ real-time updates during benchmark runs.
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import WebSocket
 
 # Configure logger
@@ -17,23 +17,27 @@ class ConnectionManager:
     Manages WebSocket connections for real-time updates.
     
     This class handles connecting, disconnecting, and broadcasting messages
-    to all active WebSocket connections.
+    to all active WebSocket connections, or only to the viewers of one run.
     """
     
     def __init__(self):
         """Initialize the connection manager with an empty list of connections."""
         self.active_connections: List[WebSocket] = []
+        # Run watched by each connection (None for connections not tied to a run)
+        self.run_ids: Dict[WebSocket, Optional[str]] = {}
         logger.info("ConnectionManager initialized")
 
-    async def connect(self, websocket: WebSocket) -> None:
+    async def connect(self, websocket: WebSocket, run_id: Optional[str] = None) -> None:
         """
         Accept a new WebSocket connection and add it to the active connections.
         
         Args:
             websocket: The WebSocket connection to accept
+            run_id: The run this connection is watching, if any
         """
         await websocket.accept()
         self.active_connections.append(websocket)
+        self.run_ids[websocket] = str(run_id) if run_id is not None else None
         logger.debug(f"New WebSocket connection accepted. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket) -> None:
@@ -44,6 +48,7 @@ class ConnectionManager:
             websocket: The WebSocket connection to remove
         """
         self.active_connections.remove(websocket)
+        self.run_ids.pop(websocket, None)
         logger.debug(f"WebSocket connection disconnected. Remaining connections: {len(self.active_connections)}")
 
     async def broadcast(self, message: Dict[str, Any]) -> None:
@@ -53,16 +58,30 @@ class ConnectionManager:
         Args:
             message: The message to broadcast as a JSON-serializable dictionary
         """
-        if not self.active_connections:
+        await self._send(list(self.active_connections), message)
+
+    async def broadcast_run(self, run_id: str, message: Dict[str, Any]) -> None:
+        """
+        Send a message to the connections watching one run.
+        
+        Args:
+            run_id: The run whose viewers receive the message
+            message: The message to send as a JSON-serializable dictionary
+        """
+        run_id = str(run_id)
+        await self._send([c for c in self.active_connections if self.run_ids.get(c) == run_id], message)
+
+    async def _send(self, connections: List[WebSocket], message: Dict[str, Any]) -> None:
+        if not connections:
             logger.debug("No active connections to broadcast to")
             return
             
-        logger.debug(f"Broadcasting message to {len(self.active_connections)} connections")
+        logger.debug(f"Broadcasting message to {len(connections)} connections")
         
         # Keep track of connections that failed to receive the message
         disconnected = []
         
-        for i, connection in enumerate(self.active_connections):
+        for i, connection in enumerate(connections):
             try:
                 await connection.send_json(message)
             except Exception as e:
@@ -73,6 +92,7 @@ class ConnectionManager:
         for conn in disconnected:
             try:
                 self.active_connections.remove(conn)
+                self.run_ids.pop(conn, None)
                 logger.info(f"Removed disconnected WebSocket connection. Remaining: {len(self.active_connections)}")
             except ValueError:
                 pass  # Connection was already removed
\ No newline at end of file
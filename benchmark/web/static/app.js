@@ -25,9 +25,14 @@ const BenchmarkApp = {
     noUpdateCount: 0,
     lastUpdateTime: Date.now(),
     scoredCount: 0,
-    totalItems: 0
+    totalItems: 0,
+    pendingRatings: {},
+    ratingTimer: null
   },
   
+  // Delay before queued ratings are sent in one request
+  RATING_DEBOUNCE_MS: 800,
+  
   /**
    * Initialize the application
    */
@@ -262,12 +267,17 @@ const BenchmarkApp = {
         })
       });
       
+      if (!resp.ok) {
+        const { detail } = await resp.json();
+        throw new Error(detail || `HTTP ${resp.status}`);
+      }
       const { run_id } = await resp.json();
       this.state.runId = run_id;
       this.elements.logContainer.textContent += `Run ID: ${run_id}\n`;
       
-      // Add export report button
+      // Add export report button and run controls
       this.addReportButton();
+      this.addRunControls();
       
       // Setup WebSocket and polling
       this.setupStatusMonitoring();
@@ -456,6 +466,60 @@ const BenchmarkApp = {
     this.elements.resultsSection.appendChild(reportBtn);
   },
   
+  /**
+   * Add pause/resume/cancel buttons for the active run
+   */
+  addRunControls() {
+    if (this.elements.resultsSection.querySelector('.run-controls')) {
+      return; // Controls already exist
+    }
+    
+    const controls = document.createElement('div');
+    controls.className = 'run-controls';
+    controls.style.marginTop = '10px';
+    
+    ['pause', 'resume', 'cancel'].forEach(action => {
+      const btn = document.createElement('button');
+      btn.textContent = action.charAt(0).toUpperCase() + action.slice(1);
+      btn.style.marginRight = '5px';
+      btn.addEventListener('click', async () => {
+        if (action === 'cancel' && !confirm('Cancel this run?')) return;
+        try {
+          const resp = await fetch(`/api/run/${this.state.runId}/${action}`, { method: 'POST' });
+          const result = await resp.json();
+          this.elements.logContainer.textContent += `${action}: ${result.status}${result.message ? ' - ' + result.message : ''}\n`;
+        } catch (e) {
+          console.error(`Run ${action} error:`, e);
+        }
+      });
+      controls.appendChild(btn);
+    });
+    
+    const budget = document.createElement('span');
+    budget.className = 'run-budget';
+    budget.style.marginLeft = '10px';
+    controls.appendChild(budget);
+    
+    this.elements.resultsSection.appendChild(controls);
+  },
+  
+  /**
+   * Show run state and budget consumption
+   */
+  updateRunState(msg) {
+    if (msg.run_id !== this.state.runId) return;
+    const span = this.elements.resultsSection && this.elements.resultsSection.querySelector('.run-budget');
+    if (!span) return;
+    let text = `${msg.state}: ${msg.finished}/${msg.total}`;
+    const budget = msg.budget;
+    if (budget) {
+      text += ` | ${budget.calls} calls, cost ${budget.cost}, ${budget.elapsed_s}s`;
+      if (budget.error_rate !== null) text += `, ${Math.round(budget.error_rate * 100)}% errors`;
+      if (budget.tripped) text += ` | stopped: ${budget.tripped}`;
+    }
+    span.textContent = text;
+  },
+  
   /**
    * Setup WebSocket and polling for status updates
    */
@@ -467,7 +531,13 @@ const BenchmarkApp = {
     ws.onmessage = (event) => {
       try {
         const msg = JSON.parse(event.data);
-        this.updateUIWithStatus(msg);
+        if (msg.type === 'run_state') {
+          this.updateRunState(msg);
+        } else if (msg.type === 'rating') {
+          this.applyRatings(msg);
+        } else {
+          this.updateUIWithStatus(msg);
+        }
         this.state.lastUpdateTime = Date.now();
       } catch (e) {
         console.error('Message parse error:', e);
@@ -547,9 +617,9 @@ const BenchmarkApp = {
       }
       
       // Check if all items are completed
-      const allCompleted = statuses.length > 0 && statuses.every(s => s.status === 'scored' || s.status === 'evaluating');
+      const allCompleted = statuses.length > 0 && statuses.every(s => ['scored', 'evaluating', 'cancelled', 'skipped'].includes(s.status));
       if (allCompleted) {
-        const allScored = statuses.every(s => s.status === 'scored');
+        const allScored = statuses.every(s => ['scored', 'cancelled', 'skipped'].includes(s.status));
         if (allScored) {
           clearInterval(this.state.pollingInterval);
           console.log("All items scored. Polling stopped.");
@@ -616,6 +686,7 @@ const BenchmarkApp = {
       ratingDiv.appendChild(label);
       
       const select = document.createElement('select');
+      select.id = `rating-${msg.run_item_id}`;
       select.innerHTML = '<option value="">--</option>';
       for (let i = 1; i <= 5; i++) {
         const opt = document.createElement('option'); 
@@ -624,16 +695,8 @@ const BenchmarkApp = {
         select.appendChild(opt);
       }
       
-      select.addEventListener('change', async () => {
-        try {
-          await fetch('/api/rate', {
-            method: 'POST', 
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({ run_item_id: msg.run_item_id, stars: select.value })
-          });
-        } catch (e) {
-          console.error('Rating error:', e);
-        }
+      select.addEventListener('change', () => {
+        if (select.value) this.queueRating(msg.run_item_id, select.value);
       });
       
       ratingDiv.appendChild(select);
@@ -646,6 +709,61 @@ const BenchmarkApp = {
     }
   },
   
+  /**
+   * Queue a rating; queued ratings are sent together once clicks pause
+   */
+  queueRating(runItemId, stars) {
+    this.state.pendingRatings[runItemId] = Number(stars);
+    clearTimeout(this.state.ratingTimer);
+    this.state.ratingTimer = setTimeout(() => this.flushRatings(), this.RATING_DEBOUNCE_MS);
+  },
+  
+  /**
+   * Send all queued ratings in one bulk request
+   */
+  async flushRatings(useBeacon = false) {
+    clearTimeout(this.state.ratingTimer);
+    const pending = this.state.pendingRatings;
+    this.state.pendingRatings = {};
+    const ratings = Object.entries(pending).map(([id, stars]) => ({ run_item_id: Number(id), stars }));
+    if (ratings.length === 0) return;
+    
+    const body = JSON.stringify({ ratings });
+    if (useBeacon && navigator.sendBeacon) {
+      navigator.sendBeacon('/api/rate/bulk', new Blob([body], { type: 'application/json' }));
+      return;
+    }
+    try {
+      const resp = await fetch('/api/rate/bulk', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body
+      });
+      const result = await resp.json();
+      if (result.status !== 'success') {
+        console.error('Rating error:', result.message);
+      }
+    } catch (e) {
+      console.error('Rating error:', e);
+      // Requeue ratings that were not superseded by newer clicks
+      ratings.forEach(r => {
+        if (!(r.run_item_id in this.state.pendingRatings)) this.state.pendingRatings[r.run_item_id] = r.stars;
+      });
+    }
+  },
+  
+  /**
+   * Apply ratings made by other viewers of the run
+   */
+  applyRatings(msg) {
+    if (msg.run_id !== this.state.runId) return;
+    msg.ratings.forEach(r => {
+      if (r.run_item_id in this.state.pendingRatings) return;  // Local change not yet sent
+      const select = document.getElementById(`rating-${r.run_item_id}`);
+      if (select) select.value = String(r.stars);
+    });
+  },
+  
   /**
    * Show an error message to the user
    */
@@ -675,4 +793,7 @@ const BenchmarkApp = {
 // Initialize the application when the DOM is ready
 document.addEventListener('DOMContentLoaded', () => {
   BenchmarkApp.init();
-});
\ No newline at end of file
+});
+
+// Send ratings still waiting for the debounce before the page goes away
+window.addEventListener('pagehide', () => BenchmarkApp.flushRatings(true));
\ No newline at end of file
@@ -14,6 +14,7 @@ setup(
         "aiofiles",
         "jinja2",
         "pillow",
+        "numpy",
         "python-dotenv",
         "openai>=0.27.0",
     ],
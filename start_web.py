@@ -39,6 +39,12 @@ def main():
         action="store_true", 
         help="Enable auto-reload when code changes"
     )
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        default=1, 
+        help="Number of worker processes (default: 1; needs a shared BENCHMARK_EVENT_BUS, not memory, when > 1)"
+    )
     parser.add_argument(
         "--debug", 
         action="store_true", 
@@ -56,6 +62,12 @@ def main():
         logger.warning("Face swapping functionality will not work without it.")
         logger.warning("Please set it in your environment or .env file.")
     
+    # Workers only see each other's run progress through a shared event bus
+    if args.workers > 1 and (os.getenv("BENCHMARK_EVENT_BUS") or "sqlite").startswith("memory"):
+        logger.warning(f"Running {args.workers} workers with the in-memory event bus;")
+        logger.warning("clients will only see runs started on the worker they are connected to.")
+        logger.warning("Set BENCHMARK_EVENT_BUS=sqlite or BENCHMARK_EVENT_BUS=socket (with a running broker).")
+    
     # Set log level based on debug flag
     if args.debug:
         logger.setLevel(logging.DEBUG)
@@ -72,6 +84,7 @@ def main():
         host=args.host, 
         port=args.port, 
         reload=args.reload,
+        workers=None if args.reload else args.workers,
         log_level="debug" if args.debug else "info"
     )
 
@@ -0,0 +1,16 @@
+"""
+Shared test setup.
+
+The database, run directory and event log are pointed at a scratch directory before any
+``benchmark`` module reads its configuration, so tests never touch the
+project's own ``benchmark.db``, ``runs/`` or event log.
+"""
+
+import os
+import tempfile
+
+_SCRATCH = tempfile.mkdtemp(prefix="benchmark-tests-")
+os.environ.setdefault("BENCHMARK_DATABASE_URL", f"sqlite:///{os.path.join(_SCRATCH, 'benchmark.db')}")
+os.environ.setdefault("BENCHMARK_RUNS_DIR", os.path.join(_SCRATCH, "runs"))
+os.environ.setdefault("BENCHMARK_EVENT_BUS", f"sqlite:{os.path.join(_SCRATCH, 'events.db')}")
+os.makedirs(os.environ["BENCHMARK_RUNS_DIR"], exist_ok=True)
@@ -0,0 +1,68 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from benchmark.core.plugins import baseline_replicate as plugin
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Count uploads through a fake files API."""
+    created = []
+
+    def create(buffer, filename):
+        created.append(filename)
+        return SimpleNamespace(urls={"get": f"https://files/{len(created)}/{filename}"})
+
+    monkeypatch.setattr(plugin.replicate, "files", SimpleNamespace(create=create), raising=False)
+    monkeypatch.setattr(plugin, "_upload_cache", plugin.OrderedDict())
+    return created
+
+
+def test_upload_cache_expires_and_is_capped(monkeypatch, uploads):
+    url = plugin._upload(b"a", "a.png")
+    assert plugin._upload(b"a", "a.png") == url
+    assert len(uploads) == 1
+
+    monkeypatch.setattr(plugin, "UPLOAD_TTL", -1)
+    assert plugin._upload(b"b", "b.png") != plugin._upload(b"b", "b.png")
+
+    monkeypatch.setattr(plugin, "UPLOAD_CACHE_SIZE", 2)
+    monkeypatch.setattr(plugin, "UPLOAD_TTL", 60)
+    for data in (b"c", b"d", b"e"):
+        plugin._upload(data, "x.png")
+    assert len(plugin._upload_cache) == 2
+
+
+def test_failed_prediction_forgets_inputs(monkeypatch, uploads):
+    template, avatar = plugin._upload(b"t", "t.png"), plugin._upload(b"a", "a.png")
+    prediction = SimpleNamespace(status="failed", error="input not found", id="p1")
+    monkeypatch.setattr(plugin.replicate, "predictions", SimpleNamespace(create=lambda **kwargs: prediction))
+
+    with pytest.raises(plugin.FaceSwapError):
+        plugin._swap_face(template, avatar)
+    assert plugin._upload(b"t", "t.png") != template
+    assert len(uploads) == 3
+
+
+def test_failed_region_cancels_siblings(monkeypatch, tmp_path):
+    template_path = tmp_path / "template.png"
+    Image.new("RGB", (64, 32)).save(template_path)
+    monkeypatch.setattr(plugin, "_upload", lambda data, name: name)
+    monkeypatch.setattr(plugin, "_upload_file", lambda path: path)
+    sibling_cancelled = threading.Event()
+
+    def swap_face(crop, avatar, cancel_event, **kwargs):
+        if crop == "face_1.png":
+            raise plugin.FaceSwapError("provider failed")
+        if cancel_event.wait(5):
+            sibling_cancelled.set()
+            raise plugin.FaceSwapCancelled("cancelled")
+        return Image.new("RGB", (32, 32))
+
+    monkeypatch.setattr(plugin, "_swap_face", swap_face)
+    with pytest.raises(plugin.FaceSwapError, match="provider failed"):
+        plugin._swap_multiple(str(template_path), ["a.png", "b.png"])
+    assert sibling_cancelled.is_set()
@@ -0,0 +1,116 @@
+import asyncio
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from benchmark.core.events import MemoryBus, SQLiteBus, SocketBus, get_event_bus, run_broker
+from benchmark.core.runner import start_run
+from benchmark.core.scheduler import Scheduler
+
+
+@pytest.fixture
+def short_dir():
+    # Unix socket paths are limited to about 100 characters
+    path = Path(tempfile.mkdtemp(prefix="bus-", dir="/tmp"))
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _collector():
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    return received, handler
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_default_bus_is_sqlite(monkeypatch):
+    monkeypatch.delenv("BENCHMARK_EVENT_BUS", raising=False)
+    assert isinstance(get_event_bus(), SQLiteBus)
+    assert isinstance(get_event_bus("memory"), MemoryBus)
+
+
+def test_sqlite_bus_delivers_across_instances(tmp_path):
+    path = str(tmp_path / "events.db")
+
+    async def main():
+        publisher, subscriber = SQLiteBus(path, poll_interval=0.01), SQLiteBus(path, poll_interval=0.01)
+        received, handler = _collector()
+        subscriber.subscribe(handler)
+        await publisher.start()
+        await subscriber.start()
+        for i in range(50):
+            await publisher.publish({"type": "item", "seq": i})
+        await _wait_for(lambda: len(received) == 50)
+        await publisher.stop()
+        await subscriber.stop()
+        return received
+
+    assert [m["seq"] for m in asyncio.run(main())] == list(range(50))
+
+
+def test_socket_bus_relays_through_broker(short_dir):
+    address = f"unix:{short_dir / 'events.sock'}"
+
+    async def main():
+        ready = asyncio.Event()
+        broker = asyncio.create_task(run_broker(address, ready))
+        await asyncio.wait_for(ready.wait(), 5)
+        first, second = SocketBus(address), SocketBus(address)
+        received, handler = _collector()
+        second.subscribe(handler)
+        await first.start()
+        await second.start()
+        for i in range(50):
+            await first.publish({"type": "item", "seq": i})
+        await _wait_for(lambda: len(received) == 50)
+        await first.stop()
+        await second.stop()
+        broker.cancel()
+        await asyncio.gather(broker, return_exceptions=True)
+        return received
+
+    assert [m["seq"] for m in asyncio.run(main())] == list(range(50))
+
+
+def test_control_reaches_owning_scheduler(monkeypatch, tmp_path):
+    monkeypatch.setenv("SYNTHETIC_LATENCY", "fixed:0.2")
+    monkeypatch.setenv("SYNTHETIC_FAILURE_RATE", "0")
+    monkeypatch.setenv("SYNTHETIC_OUTPUT_SIZE", "32x32")
+    run_id = start_run(tool_ids=["synthetic"], cases=[{"id": f"case_{i}"} for i in range(4)])
+    path = str(tmp_path / "events.db")
+
+    async def main():
+        # Two workers: the owner executes the run, the other only relays control requests
+        owner_bus, other_bus = SQLiteBus(path, poll_interval=0.01), SQLiteBus(path, poll_interval=0.01)
+        owner, other = Scheduler(max_concurrency=1), Scheduler(max_concurrency=1)
+        owner.listen(owner_bus)
+        other.listen(other_bus)
+        await owner_bus.start()
+        await other_bus.start()
+        handle = await owner.submit(run_id, owner_bus)
+
+        paused = await other.control(run_id, "pause")
+        assert handle.state == "paused"
+        missing = await other.control("999999", "pause")
+        cancelled = await other.control(run_id, "cancel")
+        await asyncio.wait_for(handle.wait(), 5)
+        await owner_bus.stop()
+        await other_bus.stop()
+        return paused, missing, cancelled, handle
+
+    paused, missing, cancelled, handle = asyncio.run(main())
+    assert paused == {"status": "success", "state": "paused"}
+    assert missing["status"] == "error"
+    assert cancelled["status"] == "success"
+    assert handle.state == "cancelled"
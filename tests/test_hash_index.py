@@ -0,0 +1,98 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from benchmark.core.db import SessionLocal, init_db
+from benchmark.core.hash_index import classify_output, group_duplicates, on_placeholder_canvas
+from benchmark.core.models import ImageHash
+from benchmark.core.runner import start_run
+from benchmark.utils.phash import dhash, to_hex
+
+
+def _placeholder():
+    image = Image.new("RGB", (512, 512), color=(200, 200, 200))
+    draw = ImageDraw.Draw(image)
+    draw.text((10, 10), "Error in synthetic:", fill=(255, 0, 0))
+    draw.text((10, 30), "Synthetic failure for case tc_01...", fill=(0, 0, 0))
+    return image
+
+
+def _gradient():
+    image = Image.new("L", (256, 256))
+    image.putdata([x for y in range(256) for x in range(256)])
+    return image.convert("RGB")
+
+
+def _classify(image, template=None):
+    template_hash = dhash(template) if template is not None else None
+    return classify_output(dhash(image), template_hash, placeholder_canvas=on_placeholder_canvas(image))
+
+
+def test_error_placeholder_flagged():
+    assert _classify(_placeholder()) == "error_placeholder"
+
+
+@pytest.mark.parametrize("image", [
+    Image.new("RGB", (512, 512), color=(0, 0, 0)),
+    Image.new("RGB", (512, 512), color=(255, 255, 255)),
+    _gradient(),
+], ids=["black", "white", "gradient"])
+def test_flat_outputs_not_placeholder(image):
+    # Every one of these has the placeholder's dHash
+    assert dhash(image) == dhash(_placeholder())
+    assert _classify(image) is None
+
+
+def test_unchanged_template_flagged():
+    template = Image.effect_mandelbrot((256, 256), (-2, -1.5, 1, 1.5), 50).convert("RGB")
+    assert _classify(template.copy(), template) == "unchanged_template"
+
+
+@pytest.mark.parametrize("max_distance", [-1, 65])
+def test_group_duplicates_rejects_bad_distance(max_distance):
+    with pytest.raises(ValueError):
+        group_duplicates(None, max_distance=max_distance)
+
+
+def _output_row(session, run_id, index, value):
+    session.add(ImageHash(path=f"/runs/{run_id}/synthetic/dup_{index}.png", kind="output", run_id=run_id,
+                          run_item_id=None, case_id=f"dup_{index}", tool_id="synthetic", dhash=to_hex(value)))
+
+
+def test_group_duplicates_collapses_identical_hashes():
+    init_db()
+    session = SessionLocal()
+    run_id = 900001
+    try:
+        for i in range(300):
+            _output_row(session, run_id, i, 0)
+        _output_row(session, run_id, 300, 0b11)  # two bits from the placeholders
+        _output_row(session, run_id, 301, (1 << 64) - 1)  # unrelated
+        session.commit()
+        groups = group_duplicates(session, [run_id], max_distance=2)
+    finally:
+        session.query(ImageHash).filter_by(run_id=run_id).delete()
+        session.commit()
+        session.close()
+    assert [len(g) for g in groups] == [301]
+
+
+def test_start_run_indexes_inputs(tmp_path):
+    template, avatar = tmp_path / "template.png", tmp_path / "avatar.png"
+    _gradient().save(template)
+    Image.new("RGB", (64, 64), (30, 90, 150)).save(avatar)
+    start_run(tool_ids=["synthetic"],
+              cases=[{"id": "idx_01", "template_image": str(template), "avatars": [str(avatar)]}])
+    session = SessionLocal()
+    try:
+        kinds = {row.path: row.kind for row in session.query(ImageHash).filter_by(case_id="idx_01")}
+    finally:
+        session.close()
+    assert kinds == {str(template): "template", str(avatar): "avatar"}
+
+
+def test_similar_rejects_invalid_hash():
+    from fastapi.testclient import TestClient
+    from benchmark.web.main import app
+
+    response = TestClient(app).get("/api/hashes/similar", params={"dhash": "not-hex"})
+    assert response.status_code == 400
@@ -0,0 +1,84 @@
+import pytest
+
+from benchmark.core.params import build_grid, expand_grid, parse_param_option
+from benchmark.core.plugins import synthetic
+from benchmark.core.runner import start_run
+
+
+def test_parse_param_option_splits_and_parses_values():
+    assert parse_param_option("synthetic.failure_rate=0,0.5") == ("synthetic", "failure_rate", [0, 0.5])
+    assert parse_param_option("synthetic.output_size=256x256") == ("synthetic", "output_size", ["256x256"])
+    assert parse_param_option("baseline_replicate.flag=true") == ("baseline_replicate", "flag", [True])
+
+
+def test_parse_param_option_quoted_values_keep_commas():
+    tool_id, key, values = parse_param_option('synthetic.latency="uniform:0.01,0.02",fixed:0.1')
+    assert (tool_id, key) == ("synthetic", "latency")
+    assert values == ["uniform:0.01,0.02", "fixed:0.1"]
+
+
+def test_parse_param_option_json_array():
+    _, _, values = parse_param_option('synthetic.latency=["normal:0.1,0.01", "none"]')
+    assert values == ["normal:0.1,0.01", "none"]
+
+
+@pytest.mark.parametrize("option", [
+    "synthetic.latency",
+    "latency=fixed:0.1",
+    ".latency=fixed:0.1",
+    "synthetic.=fixed:0.1",
+    "synthetic.latency=",
+    "synthetic.latency=fixed:0.1,",
+    'synthetic.latency="unterminated',
+    'synthetic.latency=[1,',
+])
+def test_parse_param_option_rejects_malformed(option):
+    with pytest.raises(ValueError):
+        parse_param_option(option)
+
+
+def test_build_grid_merges_repeated_options():
+    grid = build_grid(["synthetic.latency=fixed:0.1", "synthetic.latency=fixed:0.2", "synthetic.failure_rate=0"])
+    assert grid == {"synthetic": {"latency": ["fixed:0.1", "fixed:0.2"], "failure_rate": [0]}}
+    assert len(expand_grid(grid["synthetic"])) == 2
+
+
+def test_synthetic_validate_params():
+    synthetic.validate_params({"latency": "uniform:0.01,0.02", "failure_rate": 0.5, "output_size": "64x32"})
+    for params in ({"latency": "uniform:0.01"}, {"latency": 0.02}, {"failure_rate": 2},
+                   {"output_size": "big"}, {"colour": "red"}):
+        with pytest.raises(ValueError):
+            synthetic.validate_params(params)
+
+
+def test_start_run_rejects_invalid_grid_before_creating_run():
+    # The unquoted form splits the latency spec in two
+    grid = build_grid(["synthetic.latency=uniform:0.01,0.02"])
+    with pytest.raises(ValueError, match="latency"):
+        start_run(tool_ids=["synthetic"], cases=[{"id": "tc_01"}], param_grid=grid)
+
+
+def test_expand_grid_drops_repeated_values():
+    points = expand_grid({"latency": ["fixed:0.1", "fixed:0.1", "none"], "failure_rate": [0, 0]})
+    assert points == [{"failure_rate": 0, "latency": "fixed:0.1"}, {"failure_rate": 0, "latency": "none"}]
+
+
+def test_expand_grid_keeps_values_of_different_types():
+    points = expand_grid({"flag": [0, 0.0, False, 1, True, 1]})
+    assert [type(p["flag"]) for p in points] == [int, float, bool, int, bool]
+
+
+@pytest.mark.parametrize("options", [
+    {"repeats": "many"},
+    {"repeats": 0},
+    {"priority": None},
+    {"priority": 1.5},
+    {"budget": {"max_calls": "lots"}},
+    {"params": {"synthetic": {"latency": ["uniform:0.01"]}}},
+])
+def test_post_run_rejects_invalid_options(options):
+    from fastapi.testclient import TestClient
+    from benchmark.web.main import app
+
+    response = TestClient(app).post("/api/run", json={"tool_ids": ["synthetic"], "options": options})
+    assert response.status_code == 400
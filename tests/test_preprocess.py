@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from benchmark.core import preprocess
+
+PROFILE = {"max_side": 256, "format": "PNG"}
+
+
+def test_prepare_image_caches_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(preprocess, "INPUTS_CACHE_DIR", tmp_path / "cache")
+    source = tmp_path / "template.png"
+    Image.new("RGB", (1400, 700), (10, 120, 200)).save(source)
+
+    first = preprocess.prepare_image(str(source), PROFILE, "template")
+    second = preprocess.prepare_image(str(source), PROFILE, "template")
+
+    assert first == second
+    with Image.open(first) as image:
+        assert image.size == (256, 128)
+
+
+def test_prepare_image_concurrent_same_source(tmp_path, monkeypatch):
+    source = tmp_path / "template.png"
+    Image.new("RGB", (1400, 1400), (200, 40, 40)).save(source)
+    # Hold every thread after its cache miss so all of them write the entry at once
+    barrier = threading.Barrier(3, timeout=10)
+    cap_size = preprocess._cap_size
+
+    def synchronized_cap_size(image, max_side):
+        barrier.wait()
+        return cap_size(image, max_side)
+
+    monkeypatch.setattr(preprocess, "_cap_size", synchronized_cap_size)
+    for attempt in range(10):
+        cache_dir = tmp_path / f"cache_{attempt}"
+        monkeypatch.setattr(preprocess, "INPUTS_CACHE_DIR", cache_dir)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(lambda _: preprocess.prepare_image(str(source), PROFILE, "template"), range(3)))
+
+        assert len(set(results)) == 1
+        with Image.open(results[0]) as image:
+            assert image.size == (256, 256)
+        assert not list(cache_dir.rglob("*.tmp"))
@@ -0,0 +1,22 @@
+from benchmark.core.db import SessionLocal, init_db
+from benchmark.core.models import Run, RunItem
+from benchmark.report.report_builder import build_report
+
+
+def test_report_escapes_params(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    session = SessionLocal()
+    run = Run()
+    session.add(run)
+    session.commit()
+    session.add(RunItem(run_id=run.id, case_id="tc_01", tool_id="synthetic", status="scored",
+                        image_url="", params='{"latency":"<script>alert(1)</script>"}'))
+    session.commit()
+    run_id = str(run.id)
+    session.close()
+
+    with open(build_report(run_id), encoding="utf-8") as f:
+        report = f.read()
+    assert "<script>" not in report
+    assert "&lt;script&gt;" in report
@@ -0,0 +1,204 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from benchmark.core import scheduler as scheduler_module
+from benchmark.core.budget import Budget
+from benchmark.core.db import SessionLocal
+from benchmark.core.models import RunItem
+from benchmark.core.registry import PluginInfo
+from benchmark.core.runner import start_run
+from benchmark.core.scheduler import Scheduler
+
+
+@pytest.fixture(autouse=True)
+def synthetic_env(monkeypatch):
+    monkeypatch.setenv("SYNTHETIC_LATENCY", "fixed:0.05")
+    monkeypatch.setenv("SYNTHETIC_FAILURE_RATE", "0")
+    monkeypatch.setenv("SYNTHETIC_OUTPUT_SIZE", "32x32")
+
+
+def _start(count, **kwargs):
+    return start_run(tool_ids=["synthetic"], cases=[{"id": f"case_{i}"} for i in range(count)], **kwargs)
+
+
+def _run(main):
+    """Run a test coroutine, failing if the loop's exception handler is called."""
+    errors = []
+
+    async def wrapper():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        result = await main()
+        # Let done callbacks and the tasks they start run before the loop closes
+        await asyncio.sleep(0.05)
+        return result
+
+    result = asyncio.run(wrapper())
+    assert not errors, errors
+    return result
+
+
+def _statuses(run_id):
+    session = SessionLocal()
+    try:
+        return sorted(item.status for item in session.query(RunItem).filter_by(run_id=int(run_id)))
+    finally:
+        session.close()
+
+
+def test_run_completes():
+    run_id = _start(4)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=2)
+        handle = await scheduler.submit(run_id)
+        await asyncio.wait_for(handle.wait(), 10)
+        return scheduler, handle
+
+    scheduler, handle = _run(main)
+    assert handle.state == "completed"
+    assert handle.finished == 4
+    assert scheduler.inflight == 0
+    assert _statuses(run_id) == ["scored"] * 4
+
+
+def test_cancel_right_after_submit_releases_slots():
+    run_id = _start(2)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=3)
+        handle = await scheduler.submit(run_id)
+        # The dispatched tasks have not taken their first step yet
+        assert await scheduler.cancel(run_id)
+        await asyncio.wait_for(handle.wait(), 5)
+        return scheduler, handle
+
+    scheduler, handle = _run(main)
+    assert handle.state == "cancelled"
+    assert scheduler.inflight == 0
+    assert scheduler.tool_inflight == {"synthetic": 0}
+    assert not handle.inflight
+    assert scheduler.get(run_id) is None
+    assert _statuses(run_id) == ["cancelled"] * 2
+
+
+def test_cancel_mid_run():
+    run_id = _start(6)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=2)
+        handle = await scheduler.submit(run_id)
+        await asyncio.sleep(0.01)
+        assert await scheduler.cancel(run_id)
+        await asyncio.wait_for(handle.wait(), 5)
+        return scheduler, handle
+
+    scheduler, handle = _run(main)
+    assert handle.state == "cancelled"
+    assert scheduler.inflight == 0
+    assert set(_statuses(run_id)) <= {"cancelled", "scored"}
+
+
+def test_pause_and_resume():
+    run_id = _start(4)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=1)
+        handle = await scheduler.submit(run_id)
+        assert await scheduler.pause(run_id)
+        assert not await scheduler.pause(run_id)
+        # The in-flight item finishes, nothing new is dispatched
+        await asyncio.sleep(0.3)
+        paused_finished = handle.finished
+        assert handle.state == "paused"
+        assert handle.pending_count == 3
+        assert await scheduler.resume(run_id)
+        await asyncio.wait_for(handle.wait(), 10)
+        return handle, paused_finished
+
+    handle, paused_finished = _run(main)
+    assert paused_finished == 1
+    assert handle.state == "completed"
+    assert _statuses(run_id) == ["scored"] * 4
+
+
+def test_max_calls_budget_skips_the_rest():
+    run_id = _start(5)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=1)
+        handle = await scheduler.submit(run_id, budget=Budget(max_calls=2))
+        await asyncio.wait_for(handle.wait(), 10)
+        return handle
+
+    handle = _run(main)
+    assert handle.state == "stopped"
+    assert handle.budget.calls == 2
+    assert "calls" in handle.budget.tripped
+    assert _statuses(run_id) == ["scored"] * 2 + ["skipped"] * 3
+
+
+def test_error_rate_budget_stops_failing_run(monkeypatch):
+    monkeypatch.setenv("SYNTHETIC_FAILURE_RATE", "1")
+    run_id = _start(6)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=1)
+        handle = await scheduler.submit(run_id, budget=Budget(max_error_rate=0.5, error_window=2))
+        await asyncio.wait_for(handle.wait(), 10)
+        return handle
+
+    handle = _run(main)
+    assert handle.state == "stopped"
+    assert handle.budget.errors == 2
+    assert _statuses(run_id).count("skipped") == 4
+
+
+def test_error_rate_budget_stops_short_run(monkeypatch):
+    # Fewer items than the error window: the window never fills
+    monkeypatch.setenv("SYNTHETIC_FAILURE_RATE", "1")
+    run_id = _start(5)
+
+    async def main():
+        scheduler = Scheduler(max_concurrency=1)
+        budget = Budget(max_error_rate=0.5, error_window=20, min_error_samples=2)
+        handle = await scheduler.submit(run_id, budget=budget)
+        await asyncio.wait_for(handle.wait(), 10)
+        return handle
+
+    handle = _run(main)
+    assert handle.state == "stopped"
+    assert handle.budget.errors == 2
+    assert _statuses(run_id).count("skipped") == 3
+
+
+def test_item_calls_scale_with_avatars(monkeypatch):
+    infos = {
+        "per_avatar": PluginInfo(id="per_avatar", cost_per_call=0.5, calls_per_avatar=True),
+        "per_item": PluginInfo(id="per_item", cost_per_call=0.5),
+    }
+    monkeypatch.setattr(scheduler_module, "get_plugin_info", infos.__getitem__)
+    handle = SimpleNamespace(ctx=SimpleNamespace(cases_by_id={"tc_01": {"avatars": ["a.png", "b.png"]}}))
+    scheduler = Scheduler()
+
+    assert scheduler._item_calls(handle, RunItem(tool_id="per_avatar", case_id="tc_01")) == (2, 0.5)
+    assert scheduler._item_calls(handle, RunItem(tool_id="per_avatar", case_id="unknown")) == (1, 0.5)
+    assert scheduler._item_calls(handle, RunItem(tool_id="per_item", case_id="tc_01")) == (1, 0.5)
+
+    budget = Budget(max_calls=3, max_cost=10)
+    assert budget.check(1.0, 2) is None
+    budget.record_call(1.0, 2)
+    assert budget.check(1.0, 2) is not None
+    assert budget.calls == 2 and budget.cost == 1.0
+
+
+def test_tool_capacity_counts_calls(monkeypatch):
+    infos = {"per_avatar": PluginInfo(id="per_avatar", max_concurrency=3, calls_per_avatar=True)}
+    monkeypatch.setattr(scheduler_module, "get_plugin_info", infos.__getitem__)
+    scheduler = Scheduler()
+
+    assert scheduler._tool_has_capacity("per_avatar", 5)
+    scheduler.tool_inflight["per_avatar"] = 2
+    assert scheduler._tool_has_capacity("per_avatar", 1)
+    assert not scheduler._tool_has_capacity("per_avatar", 2)
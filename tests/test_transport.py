@@ -0,0 +1,57 @@
+import asyncio
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+from benchmark.config import RUNS_DIR
+from benchmark.core.db import SessionLocal
+from benchmark.core.models import RunItem
+from benchmark.core.runner import execute_run_async, start_run
+from benchmark.core.transport import get_transport, request_key
+
+CASES = [{"id": "rec_01"}, {"id": "rec_02"}]
+
+
+def _run(transport):
+    run_id = start_run(tool_ids=["synthetic"], cases=CASES, repeats=3)
+    asyncio.run(execute_run_async(run_id, transport=transport))
+    session = SessionLocal()
+    try:
+        items = session.query(RunItem).filter_by(run_id=int(run_id)).all()
+        return {(i.case_id, i.trial): (i.status, i.latency, i.image_url) for i in items}
+    finally:
+        session.close()
+
+
+def _image_path(image_url):
+    return Path(RUNS_DIR) / image_url[len("/runs/"):]
+
+
+def test_request_key_depends_on_trial():
+    case = {"id": "rec_01"}
+    assert request_key("synthetic", case) == request_key("synthetic", case, trial=0)
+    assert request_key("synthetic", case, trial=1) != request_key("synthetic", case, trial=2)
+
+
+def test_record_then_replay_matches_per_trial(tmp_path, monkeypatch):
+    monkeypatch.setenv("SYNTHETIC_LATENCY", "uniform:0.02,0.2")
+    monkeypatch.setenv("SYNTHETIC_FAILURE_RATE", "0")
+    monkeypatch.setenv("SYNTHETIC_OUTPUT_SIZE", "24x24")
+    cassettes = str(tmp_path / "cassettes")
+
+    recorded = _run(get_transport("record", cassette_dir=cassettes))
+    # Replay must not touch the plugin
+    monkeypatch.setenv("SYNTHETIC_FAILURE_RATE", "1")
+    replayed = _run(get_transport("replay", cassette_dir=cassettes))
+
+    assert set(recorded) == set(replayed) and len(recorded) == 6
+    for key, (status, latency, image_url) in recorded.items():
+        replay_status, replay_latency, replay_url = replayed[key]
+        assert status == replay_status == "scored"
+        assert abs(replay_latency - latency) < 0.05, key
+        with Image.open(_image_path(image_url)) as a, Image.open(_image_path(replay_url)) as b:
+            assert ImageChops.difference(a.convert("RGB"), b.convert("RGB")).getbbox() is None, key
+    # Trials of one case were recorded separately
+    with Image.open(_image_path(recorded[("rec_01", 0)][2])) as a, \
+            Image.open(_image_path(recorded[("rec_01", 1)][2])) as b:
+        assert ImageChops.difference(a.convert("RGB"), b.convert("RGB")).getbbox() is not None